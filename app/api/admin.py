@@ -10,23 +10,29 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.get("/links")
-async def list_links(session: Session = Depends(get_session)):
+def list_links(
+    limit: int = 100,
+    offset: int = 0,
+    session: Session = Depends(get_session)
+):
     """
-    List all question links (for debugging/admin purposes).
+    List question links, one page at a time (for debugging/admin purposes).
 
     Args:
+        limit: Maximum number of links to return (default: 100)
+        offset: Number of links to skip (default: 0)
         session: Database session
 
     Returns:
         List of QuestionLink objects
     """
-    statement = select(QuestionLink)
+    statement = select(QuestionLink).order_by(QuestionLink.id).limit(limit).offset(offset)
     results = session.exec(statement).all()
     return results
 
 
 @router.delete("/links/{link_id}")
-async def delete_link(
+def delete_link(
     link_id: int,
     session: Session = Depends(get_session)
 ):
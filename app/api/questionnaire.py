@@ -16,10 +16,11 @@ async def process_questionnaire(
     session: Session = Depends(get_session)
 ):
     """
-    Process questionnaire with single question embeddings.
+    Process questionnaire through the 4-step logic.
 
-    Processes each question individually through 4-step logic.
-    Use /batch-process for better performance with large questionnaires.
+    Questions that miss Steps 1 & 2 are embedded in a single batch call
+    instead of one OpenAI round-trip per question, so this endpoint shares
+    the /batch-process implementation.
 
     Args:
         questionnaire: Input containing client_id, provider_id and list of questions
@@ -29,13 +30,9 @@ async def process_questionnaire(
         QuestionnaireOutput with results for each question
     """
     processor = QuestionProcessor(session, questionnaire.client_id, questionnaire.provider_id)
-    results = []
-
-    for question in questionnaire.questions:
-        result = await processor.process_single_question(question)
-        results.append(result)
+    results = await processor.process_batch_questions(questionnaire.questions)
 
-    return QuestionnaireOutput(results=results)
+    return QuestionnaireOutput.model_construct(results=results)
 
 
 @router.post("/batch-process", response_model=QuestionnaireOutput)
@@ -47,14 +44,14 @@ async def batch_process_questionnaire(
     OPTIMIZED batch processing endpoint for large questionnaires.
 
     Production-ready features:
-    - Automatic chunking for batches > 2048 questions
+    - Automatic chunking into 1024-question chunks embedded concurrently
     - Exponential backoff retry logic for rate limits (3 retries: 2s, 4s, 8s)
     - Single API call per chunk instead of N individual calls
     - 60-100× faster for large batches
 
     Performance:
     - 500 questions: 1 API call instead of 500 calls
-    - 3000 questions: 2 API calls instead of 3000 calls
+    - 3000 questions: 3 concurrent API calls instead of 3000 calls
 
     Args:
         questionnaire: Input containing client_id, provider_id and list of questions
@@ -70,4 +67,4 @@ async def batch_process_questionnaire(
     processor = QuestionProcessor(session, questionnaire.client_id, questionnaire.provider_id)
     results = await processor.process_batch_questions(questionnaire.questions)
 
-    return QuestionnaireOutput(results=results)
+    return QuestionnaireOutput.model_construct(results=results)
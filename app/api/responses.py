@@ -3,10 +3,16 @@ Response management API routes.
 """
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete
 from app.models import ResponseEntry
 from app.schemas import BatchCreateInput, BatchCreateOutput, BatchCreateResponse, Answer
-from app.services import get_session, get_embedding, get_batch_embeddings
+from app.services import (
+    get_session,
+    get_embedding,
+    get_batch_embeddings,
+    add_to_embedding_index,
+    invalidate_embedding_index,
+)
 
 router = APIRouter(prefix="/responses", tags=["responses"])
 
@@ -50,6 +56,7 @@ async def create_response(
     session.add(new_response)
     session.commit()
     session.refresh(new_response)
+    add_to_embedding_index(provider_id, [new_response])
 
     return new_response
 
@@ -64,7 +71,7 @@ async def batch_create_responses(
 
     Performance optimized for large batches:
     - Single OpenAI API call for all embeddings (vs N individual calls)
-    - Automatic chunking for batches > 2048 questions
+    - Automatic chunking into 1024-question chunks embedded concurrently
     - Exponential backoff retry logic for rate limits (3 retries)
     - Transaction safety: all responses committed together or rolled back
 
@@ -117,6 +124,7 @@ async def batch_create_responses(
     embeddings = await get_batch_embeddings(texts_to_embed)
 
     # Create all ResponseEntry objects
+    new_responses = []
     created_responses = []
     for idx, response_input in enumerate(input_data.responses):
         new_response = ResponseEntry(
@@ -128,14 +136,22 @@ async def batch_create_responses(
             embedding=embeddings[idx]
         )
         session.add(new_response)
+        new_responses.append(new_response)
         created_responses.append(BatchCreateResponse(
             question_id=response_input.question_id,
             question_text=response_input.question_text,
             status="created"
         ))
 
-    # Commit all at once (atomic transaction)
-    session.commit()
+    # Flush to assign ids while the rows are still loaded, then append
+    # them to the in-memory index and commit all at once (atomic transaction)
+    session.flush()
+    add_to_embedding_index(provider_id, new_responses)
+    try:
+        session.commit()
+    except Exception:
+        invalidate_embedding_index(provider_id)
+        raise
 
     return BatchCreateOutput(
         message=f"Successfully created {len(created_responses)} canonical responses",
@@ -145,34 +161,50 @@ async def batch_create_responses(
 
 
 @router.get("/list")
-async def list_responses(
+def list_responses(
     client_id: Optional[str] = None,
     provider_id: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
     session: Session = Depends(get_session)
 ):
     """
-    List all response entries.
+    List response entries, one page at a time.
+
+    Only the display columns are selected; the 1024-dim embeddings are
+    never loaded or serialized.
 
     Args:
         client_id: Optional client filter (not used, kept for API compatibility)
         provider_id: Optional provider filter
+        limit: Maximum number of entries to return (default: 100)
+        offset: Number of entries to skip (default: 0)
         session: Database session
 
     Returns:
-        List of ResponseEntry objects
+        List of response entries without embeddings
     """
-    query = select(ResponseEntry)
+    query = select(
+        ResponseEntry.id,
+        ResponseEntry.provider_id,
+        ResponseEntry.question_id,
+        ResponseEntry.question_text,
+        ResponseEntry.answer,
+        ResponseEntry.evidence
+    )
 
     # Filter by provider_id if provided
     if provider_id:
         query = query.where(ResponseEntry.provider_id == provider_id)
 
+    query = query.order_by(ResponseEntry.id).limit(limit).offset(offset)
+
     results = session.exec(query).all()
-    return results
+    return [dict(row._mapping) for row in results]
 
 
 @router.delete("/{response_id}")
-async def delete_response(
+def delete_response(
     response_id: int,
     session: Session = Depends(get_session)
 ):
@@ -189,12 +221,16 @@ async def delete_response(
     Raises:
         HTTPException: If response not found
     """
-    response_entry = session.get(ResponseEntry, response_id)
+    # Only the provider is needed; loading the entity would also read its embedding
+    provider_id = session.exec(
+        select(ResponseEntry.provider_id).where(ResponseEntry.id == response_id)
+    ).first()
 
-    if not response_entry:
+    if provider_id is None:
         raise HTTPException(status_code=404, detail="Response not found")
 
-    session.delete(response_entry)
+    session.exec(delete(ResponseEntry).where(ResponseEntry.id == response_id))
     session.commit()
+    invalidate_embedding_index(provider_id)
 
     return {"message": f"Response {response_id} deleted successfully"}
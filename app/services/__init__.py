@@ -1,23 +1,50 @@
 """
 Services Package for business logic.
 """
-from .database import get_session, init_db
-from .embedding import init_openai_client, get_embedding, get_batch_embeddings, cosine_similarity
+from .database import get_session, init_db, warm_connection_pool
+from .embedding import (
+    init_openai_client,
+    get_embedding,
+    get_batch_embeddings,
+    cosine_similarity,
+    embedding_cache_key_text,
+)
 from .question_processor import QuestionProcessor
 from .text_utils import normalize_text, fuzzy_match_score, fuzzy_match_partial_score
-from .semantic_search import search_similar_questions, search_similar_questions_fallback
+from .semantic_search import (
+    search_similar_questions,
+    search_similar_questions_fallback,
+    search_similar_questions_batch,
+    search_similar_questions_batch_fallback,
+)
+from .embedding_index import (
+    EmbeddingIndex,
+    get_embedding_index,
+    warm_embedding_indexes,
+    add_to_embedding_index,
+    invalidate_embedding_index,
+)
 
 __all__ = [
     "get_session",
     "init_db",
+    "warm_connection_pool",
     "init_openai_client",
     "get_embedding",
     "get_batch_embeddings",
     "cosine_similarity",
+    "embedding_cache_key_text",
     "QuestionProcessor",
     "normalize_text",
     "fuzzy_match_score",
     "fuzzy_match_partial_score",
     "search_similar_questions",
     "search_similar_questions_fallback",
+    "search_similar_questions_batch",
+    "search_similar_questions_batch_fallback",
+    "EmbeddingIndex",
+    "get_embedding_index",
+    "warm_embedding_indexes",
+    "add_to_embedding_index",
+    "invalidate_embedding_index",
 ]
@@ -2,7 +2,7 @@
 Database connection and session management.
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlmodel import SQLModel, Session
 from dotenv import load_dotenv
 
@@ -13,14 +13,97 @@ load_dotenv(override=True)
 DATABASE_URL = os.getenv("DATABASE_URL", "mysql+pymysql://root:@localhost:3306/effortless_respond")
 
 # Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+# SQL logging formats every statement on the request path; enable with SQL_ECHO=1.
+# The default 5-connection pool is too small for concurrent requests.
+engine = create_engine(
+    DATABASE_URL,
+    echo=os.getenv("SQL_ECHO") == "1",
+    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_pre_ping=True
+)
+
+# Indexes for the lookup and search paths: (table, index name, columns, unique).
+# MySQL has no ANN index type, so the vector search narrows by provider_id
+# through a B-tree before computing VECTOR_COSINE_DISTANCE on each row; the
+# unique composites turn the Step 1 link / exact ID lookups into point reads.
+# Unique composites come first so they also cover the provider_id prefix.
+# The link lookup reads only linked_response_id, so appending it makes that
+# index covering (InnoDB has no INCLUDE; the index alone answers the query).
+SEARCH_INDEXES = [
+    ("responseentry", "uix_provider_question", ("provider_id", "question_id"), True),
+    ("questionlink", "uix_provider_new_question", ("provider_id", "new_question_id"), True),
+    ("questionlink", "idx_qlink_lookup", ("provider_id", "new_question_id", "linked_response_id"), False),
+    ("responseentry", "idx_provider_id", ("provider_id",), False),
+    ("questionlink", "idx_qlink_provider", ("provider_id",), False),
+]
 
 
 def init_db():
     """
-    Initialize database: create all tables.
+    Initialize database: create all tables and search indexes.
     """
     SQLModel.metadata.create_all(engine)
+    ensure_search_indexes()
+
+
+def ensure_search_indexes():
+    """
+    Create the search path indexes unless an existing index already covers them.
+
+    MySQL has no CREATE INDEX IF NOT EXISTS, so information_schema is checked
+    first. A plain index is covered by any index with the same leading
+    columns; a unique one only by a unique index on exactly those columns.
+    """
+    with engine.begin() as connection:
+        for table_name, index_name, columns, unique in SEARCH_INDEXES:
+            existing_indexes = connection.execute(text("""
+                SELECT
+                    index_name,
+                    MAX(non_unique) AS non_unique,
+                    GROUP_CONCAT(column_name ORDER BY seq_in_index) AS index_columns
+                FROM information_schema.statistics
+                WHERE table_schema = DATABASE()
+                AND table_name = :table_name
+                GROUP BY index_name
+            """), {"table_name": table_name}).all()
+
+            covered = any(
+                (tuple(row.index_columns.split(",")) == columns and not row.non_unique)
+                if unique else
+                tuple(row.index_columns.split(","))[:len(columns)] == columns
+                for row in existing_indexes
+            )
+            if covered:
+                continue
+
+            try:
+                connection.execute(text(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX {index_name} "
+                    f"ON {table_name}({', '.join(columns)})"
+                ))
+            except Exception as e:
+                # e.g. duplicate rows blocking a unique index; the app still works without it
+                print(f"Warning: Could not create index {index_name} on {table_name}: {e}")
+
+
+def warm_connection_pool():
+    """
+    Open the pool's connections at startup so the first requests don't each
+    pay for a new MySQL connection (TCP + auth).
+    """
+    connections = []
+    try:
+        for _ in range(engine.pool.size()):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    except Exception as e:
+        print(f"Warning: Could not warm connection pool: {e}")
+    finally:
+        # Closing returns each connection to the pool, still open
+        for connection in connections:
+            connection.close()
 
 
 def get_session():
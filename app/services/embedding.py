@@ -2,10 +2,19 @@
 OpenAI embedding service for generating and comparing vector embeddings.
 """
 import os
-import time
+import asyncio
+import base64
+import hashlib
+import random
+import sqlite3
 import numpy as np
+try:
+    import simsimd
+except ImportError:  # Optional SIMD kernels; NumPy is used without them
+    simsimd = None
+from collections import OrderedDict
 from typing import Optional
-from openai import OpenAI, RateLimitError, APIError
+from openai import AsyncOpenAI, RateLimitError, APIError, APIConnectionError, InternalServerError
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,7 +26,29 @@ if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY environment variable is required")
 
 # Global OpenAI client
-openai_client: Optional[OpenAI] = None
+openai_client: Optional[AsyncOpenAI] = None
+
+# Embedding model configuration
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1024
+
+# Batch embedding configuration (OpenAI accepts up to 2048 inputs per request)
+EMBEDDING_CHUNK_SIZE = 1024
+EMBEDDING_CONCURRENCY = 8
+
+# Spread the start of concurrent chunk requests over this window (seconds)
+EMBEDDING_START_JITTER = 0.1
+
+# Upper bound for one retry backoff (seconds)
+EMBEDDING_RETRY_MAX_WAIT = 30.0
+
+# In-process LRU cache of embeddings keyed by a hash of the model and input text
+EMBEDDING_CACHE_SIZE = 10000
+_embedding_cache: "OrderedDict[str, list[float]]" = OrderedDict()
+
+# Optional persistent cache (SQLite file) shared across restarts and workers
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+_persistent_cache: Optional[sqlite3.Connection] = None
 
 
 def init_openai_client():
@@ -26,16 +57,43 @@ def init_openai_client():
     """
     global openai_client
     print("Initializing OpenAI client...")
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
     print("OpenAI client initialized successfully!")
+    init_persistent_cache()
 
 
-def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
+def init_persistent_cache():
+    """
+    Open the persistent embedding cache if EMBEDDING_CACHE_PATH is set.
+    """
+    global _persistent_cache
+    if not EMBEDDING_CACHE_PATH or _persistent_cache is not None:
+        return
+
+    try:
+        _persistent_cache = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False)
+        _persistent_cache.execute("PRAGMA journal_mode=WAL")
+        _persistent_cache.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL
+            )
+        """)
+        _persistent_cache.commit()
+        print(f"Persistent embedding cache: {EMBEDDING_CACHE_PATH}")
+    except sqlite3.Error as e:
+        print(f"Warning: Could not open persistent embedding cache: {e}")
+        _persistent_cache = None
+
+
+def cosine_similarity(vec1: list[float] | np.ndarray, vec2: list[float] | np.ndarray) -> float:
     """
     Calculate cosine similarity between two vectors.
 
     MySQL doesn't have native vector operations, so we compute
-    similarity in Python using NumPy.
+    similarity in Python. With simsimd installed the dot product and both
+    norms are computed in a single SIMD pass; otherwise NumPy vdot is used.
+    Pass float32 arrays to skip the list-to-array conversion.
 
     Args:
         vec1: First vector
@@ -44,17 +102,216 @@ def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
     Returns:
         Similarity score between 0 and 1 (1 = identical, 0 = orthogonal)
     """
-    v1 = np.array(vec1)
-    v2 = np.array(vec2)
+    v1 = np.asarray(vec1, dtype=np.float32)
+    v2 = np.asarray(vec2, dtype=np.float32)
+
+    if simsimd is not None:
+        # simsimd returns cosine distance (1 - similarity); zero vectors score 0
+        if not v1.any() or not v2.any():
+            return 0.0
+        return 1.0 - float(simsimd.cosine(v1, v2))
 
-    dot_product = np.dot(v1, v2)
-    norm_v1 = np.linalg.norm(v1)
-    norm_v2 = np.linalg.norm(v2)
+    denominator = np.sqrt(np.vdot(v1, v1) * np.vdot(v2, v2))
 
-    if norm_v1 == 0 or norm_v2 == 0:
+    if denominator == 0:
         return 0.0
 
-    return float(dot_product / (norm_v1 * norm_v2))
+    return float(np.vdot(v1, v2) / denominator)
+
+
+def _decode_embedding(encoded: str) -> list[float]:
+    """
+    Decode a base64 embedding returned with encoding_format="base64".
+
+    The API then sends raw little-endian float32 bytes, decoded in one
+    NumPy call instead of parsing 1024 JSON floats per input. Vectors are
+    L2-normalized here, so every stored and query embedding is unit length
+    and cosine similarity between them is a plain dot product.
+
+    Args:
+        encoded: Base64 string of float32 values
+
+    Returns:
+        Unit-length embedding vector
+    """
+    embedding = np.frombuffer(base64.b64decode(encoded), dtype="<f4")
+    norm = np.sqrt(np.dot(embedding, embedding))
+    if norm > 0:
+        embedding = embedding / norm
+    return embedding.tolist()
+
+
+def embedding_cache_key_text(text: str) -> str:
+    """
+    Reduce a text to the form embeddings are cached and deduplicated under.
+
+    Questions differing only in case or whitespace share one embedding.
+    Unlike text_utils.normalize_text (used for fuzzy matching), punctuation
+    is kept, as it can change what the embedding means.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Lowercased text with runs of whitespace collapsed to single spaces
+    """
+    return " ".join(text.split()).lower()
+
+
+def _cache_key(text: str) -> str:
+    """
+    Build the content-addressed embedding cache key for a text.
+
+    The model and dimensions are part of the key, so changing either
+    never serves vectors from the old embedding space.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Hex BLAKE2b digest of the model, dimensions and normalized text
+    """
+    return hashlib.blake2b(
+        f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSIONS}\0{embedding_cache_key_text(text)}".encode("utf-8"),
+        digest_size=32
+    ).hexdigest()
+
+
+def _cache_get(text: str) -> Optional[list[float]]:
+    """
+    Look up a cached embedding and mark it as most recently used.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Cached embedding vector, or None on a miss
+    """
+    key = _cache_key(text)
+    embedding = _embedding_cache.get(key)
+    if embedding is not None:
+        _embedding_cache.move_to_end(key)
+    return embedding
+
+
+def _cache_put(text: str, embedding: list[float]):
+    """
+    Store an embedding, evicting the least recently used entry when full.
+
+    Args:
+        text: Input text
+        embedding: Embedding vector for the text
+    """
+    key = _cache_key(text)
+    _embedding_cache[key] = embedding
+    _embedding_cache.move_to_end(key)
+    while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+
+
+def _cache_get_many(texts: list[str]) -> list[Optional[list[float]]]:
+    """
+    Look up embeddings in the in-process cache, then the persistent cache.
+
+    Persistent hits are promoted into the in-process cache.
+
+    Args:
+        texts: Input texts
+
+    Returns:
+        Cached embedding per text (None on a miss), in input order
+    """
+    embeddings = [_cache_get(text) for text in texts]
+    if _persistent_cache is None:
+        return embeddings
+
+    missing: dict[str, list[int]] = {}
+    for i, embedding in enumerate(embeddings):
+        if embedding is None:
+            missing.setdefault(_cache_key(texts[i]), []).append(i)
+    if not missing:
+        return embeddings
+
+    keys = list(missing)
+    try:
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = _persistent_cache.execute(
+                f"SELECT key, embedding FROM embedding_cache WHERE key IN ({', '.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for key, blob in rows:
+                embedding = np.frombuffer(blob, dtype="<f4").tolist()
+                for i in missing[key]:
+                    embeddings[i] = embedding
+                _cache_put(texts[missing[key][0]], embedding)
+    except sqlite3.Error as e:
+        print(f"Warning: Persistent embedding cache lookup failed: {e}")
+
+    return embeddings
+
+
+def _cache_put_many(texts: list[str], embeddings: list[list[float]]):
+    """
+    Store new embeddings in the in-process and persistent caches.
+
+    Args:
+        texts: Input texts
+        embeddings: Embedding vector per text
+    """
+    for text, embedding in zip(texts, embeddings):
+        _cache_put(text, embedding)
+
+    if _persistent_cache is None:
+        return
+
+    try:
+        _persistent_cache.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (key, embedding) VALUES (?, ?)",
+            [
+                (_cache_key(text), np.asarray(embedding, dtype="<f4").tobytes())
+                for text, embedding in zip(texts, embeddings)
+            ]
+        )
+        _persistent_cache.commit()
+    except sqlite3.Error as e:
+        print(f"Warning: Persistent embedding cache write failed: {e}")
+
+
+def _retry_wait_time(error: APIError, retry_count: int) -> float:
+    """
+    Compute how long to wait before retrying a failed embedding request.
+
+    Honors the server's retry-after-ms / retry-after headers when present,
+    otherwise uses capped exponential backoff. Jitter keeps concurrent
+    chunks and workers from retrying in lockstep.
+
+    Args:
+        error: The retryable OpenAI error
+        retry_count: Number of retries so far (1-based)
+
+    Returns:
+        Wait time in seconds
+    """
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+
+    retry_after = None
+    try:
+        if headers.get("retry-after-ms"):
+            retry_after = float(headers["retry-after-ms"]) / 1000
+        elif headers.get("retry-after"):
+            retry_after = float(headers["retry-after"])
+    except ValueError:
+        # e.g. an HTTP date; fall back to exponential backoff
+        retry_after = None
+
+    if retry_after:
+        # Never retry before the server asked us to
+        return min(EMBEDDING_RETRY_MAX_WAIT, retry_after) * random.uniform(1.0, 1.3)
+
+    return min(EMBEDDING_RETRY_MAX_WAIT, 2 ** retry_count) * random.uniform(0.5, 1.5)
 
 
 async def get_embedding(text: str) -> list[float]:
@@ -73,13 +330,20 @@ async def get_embedding(text: str) -> list[float]:
     if openai_client is None:
         raise RuntimeError("OpenAI client not initialized")
 
-    response = openai_client.embeddings.create(
+    cached = _cache_get_many([text])[0]
+    if cached is not None:
+        return cached
+
+    response = await openai_client.embeddings.create(
         input=text,
-        model="text-embedding-3-small",
-        dimensions=1024
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSIONS,
+        encoding_format="base64"
     )
 
-    return response.data[0].embedding
+    embedding = _decode_embedding(response.data[0].embedding)
+    _cache_put_many([text], [embedding])
+    return embedding
 
 
 async def get_batch_embeddings(texts: list[str], max_retries: int = 3) -> list[list[float]]:
@@ -87,8 +351,14 @@ async def get_batch_embeddings(texts: list[str], max_retries: int = 3) -> list[l
     Generate embeddings for multiple texts with automatic chunking and retry logic.
 
     Features:
-    - Automatically splits batches larger than 2048 into chunks
-    - Exponential backoff retry for rate limits (3 retries)
+    - Serves previously embedded texts from the in-process cache and,
+      if configured, the persistent cache
+    - Sends each distinct text once, even if repeated in the input
+      (ignoring case and whitespace differences)
+    - Splits texts into length-sorted chunks of 1024 sent concurrently
+      (at most 8 requests in flight, starts staggered by up to 100ms)
+    - Retries rate limits, 5xx and connection errors (3 retries) using
+      Retry-After or jittered exponential backoff; other errors fail fast
     - Preserves order of embeddings
 
     Args:
@@ -106,59 +376,84 @@ async def get_batch_embeddings(texts: list[str], max_retries: int = 3) -> list[l
     if openai_client is None:
         raise RuntimeError("OpenAI client not initialized")
 
-    BATCH_SIZE_LIMIT = 2048
-    all_embeddings = []
-
-    # Split into chunks if needed
-    chunks = []
-    if len(texts) > BATCH_SIZE_LIMIT:
-        # Split into chunks of 2048
-        for i in range(0, len(texts), BATCH_SIZE_LIMIT):
-            chunks.append(texts[i:i + BATCH_SIZE_LIMIT])
-    else:
-        chunks = [texts]
-
-    # Process each chunk with retry logic
-    for chunk_idx, chunk in enumerate(chunks):
+    # Serve cache hits and send each distinct missing text to the API once
+    all_embeddings = _cache_get_many(texts)
+    first_index: dict[str, int] = {}
+    for i, embedding in enumerate(all_embeddings):
+        if embedding is None:
+            first_index.setdefault(embedding_cache_key_text(texts[i]), i)
+    missing_indices = list(first_index.values())
+    if not missing_indices:
+        return all_embeddings
+
+    # Sort misses by length so each chunk holds similarly sized inputs
+    missing_indices.sort(key=lambda i: len(texts[i]))
+    chunks = [
+        missing_indices[i:i + EMBEDDING_CHUNK_SIZE]
+        for i in range(0, len(missing_indices), EMBEDDING_CHUNK_SIZE)
+    ]
+    semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+    async def _embed_chunk(chunk_idx: int, chunk: list[int]) -> list[list[float]]:
+        """Embed one chunk with retry logic, bounded by the semaphore."""
         retry_count = 0
-        last_error = None
-
-        while retry_count <= max_retries:
-            try:
-                # Attempt batch embedding API call
-                batch_response = openai_client.embeddings.create(
-                    input=chunk,
-                    model="text-embedding-3-small",
-                    dimensions=1024
-                )
-
-                # Extract embeddings in order
-                chunk_embeddings = [item.embedding for item in batch_response.data]
-                all_embeddings.extend(chunk_embeddings)
-
-                # Success - break retry loop
-                break
-
-            except RateLimitError as e:
-                last_error = e
-                retry_count += 1
-
-                if retry_count > max_retries:
-                    # Max retries reached
-                    raise RateLimitError(
-                        f"Rate limit exceeded after {max_retries} retries. "
-                        f"Chunk {chunk_idx + 1}/{len(chunks)} failed."
+
+        if chunk_idx > 0:
+            # Stagger concurrent requests instead of firing them in one burst
+            await asyncio.sleep(random.uniform(0, EMBEDDING_START_JITTER))
+
+        async with semaphore:
+            while True:
+                try:
+                    # Attempt batch embedding API call
+                    batch_response = await openai_client.embeddings.create(
+                        input=[texts[i] for i in chunk],
+                        model=EMBEDDING_MODEL,
+                        dimensions=EMBEDDING_DIMENSIONS,
+                        encoding_format="base64"
                     )
 
-                # Exponential backoff: 2^retry * 1 second
-                wait_time = (2 ** retry_count) * 1
-                print(f"Rate limit hit. Retry {retry_count}/{max_retries} after {wait_time}s...")
-                time.sleep(wait_time)
+                    # Extract embeddings in order
+                    return [_decode_embedding(item.embedding) for item in batch_response.data]
+
+                except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                    # Transient error (429, 5xx, timeout) - retry with backoff
+                    retry_count += 1
+
+                    if retry_count > max_retries:
+                        # Max retries reached
+                        print(
+                            f"Embedding chunk {chunk_idx + 1}/{len(chunks)} failed "
+                            f"after {max_retries} retries: {e}"
+                        )
+                        raise
+
+                    wait_time = _retry_wait_time(e, retry_count)
+                    print(f"{type(e).__name__}. Retry {retry_count}/{max_retries} after {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+
+                except APIError as e:
+                    # Client error (4xx) - don't retry, raise immediately
+                    print(f"OpenAI API error on chunk {chunk_idx + 1}/{len(chunks)}: {e}")
+                    raise
 
-            except APIError as e:
-                # API error - don't retry, raise immediately
-                raise APIError(
-                    f"OpenAI API error on chunk {chunk_idx + 1}/{len(chunks)}: {str(e)}"
-                )
+    chunk_embeddings = await asyncio.gather(
+        *[_embed_chunk(chunk_idx, chunk) for chunk_idx, chunk in enumerate(chunks)]
+    )
+
+    # Merge new embeddings back into input order and cache them
+    for chunk, embeddings in zip(chunks, chunk_embeddings):
+        for i, embedding in zip(chunk, embeddings):
+            all_embeddings[i] = embedding
+
+    # Fill in repeated texts from their first occurrence
+    for i, embedding in enumerate(all_embeddings):
+        if embedding is None:
+            all_embeddings[i] = all_embeddings[first_index[embedding_cache_key_text(texts[i])]]
+
+    _cache_put_many(
+        [texts[i] for i in missing_indices],
+        [all_embeddings[i] for i in missing_indices]
+    )
 
     return all_embeddings
@@ -0,0 +1,321 @@
+"""
+In-memory embedding index for answering semantic search without the database.
+
+For corpora that fit in memory, a single float32 matrix product against all
+of a provider's L2-normalized embeddings is faster than a vector query round-trip.
+Indexes are loaded at startup (or on first use), appended to in place when
+responses are created, and reloaded after deletes or when the database shows
+rows written by another process.
+"""
+import threading
+from typing import Optional
+import numpy as np
+try:
+    import simsimd
+except ImportError:  # Optional SIMD kernels; NumPy/BLAS is used without them
+    simsimd = None
+from sqlmodel import Session, select, func
+from app.models import ResponseEntry
+from .database import engine
+from .semantic_search import SemanticSearchResult
+
+# Providers with more rows than this are searched in MySQL instead
+IN_MEMORY_SEARCH_MAX_ROWS = 50000
+
+# Rows fetched (and converted to float32) per round-trip when loading an index
+LOAD_BATCH_SIZE = 1000
+
+# Loaded indexes per provider (None = too large, use MySQL)
+_indexes: dict[str, Optional["EmbeddingIndex"]] = {}
+
+# Freshness token ((row count, max id) of the provider) of each cached
+# index; a token that no longer matches the database means another worker,
+# script or direct SQL write inserted or deleted the provider's rows
+_tokens: dict[str, tuple[int, Optional[int]]] = {}
+
+# Bumped on every write so a load racing with a write is not cached
+_version = 0
+_lock = threading.Lock()
+
+
+class EmbeddingIndex:
+    """
+    L2-normalized float32 embedding matrix for one provider's responses.
+
+    Rows are only ever appended: the matrix lives in a buffer with spare
+    capacity, and readers take a prefix of it, so appends never disturb a
+    search that is already running.
+
+    Attributes:
+        responses: ResponseEntry rows (without embeddings), one per matrix row
+    """
+
+    def __init__(self, responses: list[ResponseEntry], embeddings: list[list[float]] | np.ndarray):
+        self.responses = list(responses)
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        self._rows = _normalize(matrix) if self.responses else matrix.reshape(0, 0)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(N, 1024) float32 matrix of unit-length embeddings, one row per response."""
+        # Read the count first: the buffer always holds at least that many rows
+        count = len(self.responses)
+        return self._rows[:count]
+
+    def search(self, query_embeddings: list[list[float]], top_k: int = 1) -> list[list[SemanticSearchResult]]:
+        """
+        Find the most similar responses for each query embedding.
+
+        Args:
+            query_embeddings: Query vector embeddings (1024 dimensions each)
+            top_k: Number of top results to return per query (default: 1)
+
+        Returns:
+            One list of SemanticSearchResult objects per query embedding,
+            in input order, each ordered by similarity (best first). Scores
+            are (1 + cosine) / 2 in [0, 1], matching the MySQL search.
+        """
+        matrix = self.matrix
+        if not len(matrix):
+            return [[] for _ in query_embeddings]
+
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+
+        # Similarity of every query against every response in one call, on the
+        # same 1 - distance / 2 scale as the MySQL search (see _row_to_result)
+        if simsimd is not None:
+            # threads=0 spreads rows over all cores; float32 output halves bandwidth
+            distances = np.asarray(simsimd.cdist(
+                queries, matrix, metric="cosine", out_dtype="float32", threads=0
+            ))
+            similarities = 1.0 - distances / 2.0
+        else:
+            # float32 SGEMM; multi-threaded by the BLAS NumPy is linked against
+            similarities = (1.0 + queries @ matrix.T) / 2.0
+
+        if top_k == 1:
+            top_indices = similarities.argmax(axis=1)[:, None]
+        elif top_k >= similarities.shape[1]:
+            top_indices = np.argsort(-similarities, axis=1)
+        else:
+            # O(N) selection of the top_k columns, then sort only those
+            top_indices = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+            top_scores = np.take_along_axis(similarities, top_indices, axis=1)
+            top_indices = np.take_along_axis(top_indices, np.argsort(-top_scores, axis=1), axis=1)
+
+        return [
+            [
+                SemanticSearchResult(self.responses[i], float(row_similarities[i]))
+                for i in row_indices
+            ]
+            for row_indices, row_similarities in zip(top_indices, similarities)
+        ]
+
+    def append(self, responses: list[ResponseEntry], embeddings: list[list[float]]):
+        """
+        Append rows to the index in place.
+
+        Costs O(len(responses)) amortized: the buffer grows by doubling
+        instead of being copied on every insert.
+
+        Args:
+            responses: ResponseEntry rows (without embeddings) to append
+            embeddings: Embedding vector per appended response
+        """
+        new_rows = _normalize(np.asarray(embeddings, dtype=np.float32))
+        start = len(self.responses)
+        end = start + len(responses)
+
+        if not start or end > len(self._rows):
+            # Copy into a larger buffer; searches keep reading the old one
+            rows = np.empty((max(end, 2 * start), new_rows.shape[1]), dtype=np.float32)
+            if start:
+                rows[:start] = self._rows[:start]
+            rows[start:end] = new_rows
+            self._rows = rows
+        else:
+            # Rows past len(responses) are not visible to searches yet
+            self._rows[start:end] = new_rows
+
+        # Publish the rows only once they are written
+        self.responses.extend(responses)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale each row to unit length (zero rows are left as zeros).
+
+    Args:
+        vectors: (N, D) float32 matrix
+
+    Returns:
+        Row-normalized, C-contiguous float32 matrix (the layout BLAS and
+        SimSIMD read without copying)
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+
+def _display_copy(response) -> ResponseEntry:
+    """
+    Copy a response's display columns into a detached ResponseEntry.
+
+    Args:
+        response: ResponseEntry or result row with the display columns
+
+    Returns:
+        ResponseEntry without embedding, safe to keep across sessions
+    """
+    return ResponseEntry(
+        id=response.id,
+        provider_id=response.provider_id,
+        question_id=response.question_id,
+        question_text=response.question_text,
+        answer=response.answer,
+        evidence=response.evidence
+    )
+
+
+def _freshness_token(session: Session, provider_id: str) -> tuple[int, Optional[int]]:
+    """
+    Get a cheap fingerprint of a provider's rows.
+
+    Any insert or delete changes the row count or the highest id, so a
+    cached index whose token matches still holds the provider's rows.
+
+    Args:
+        session: Database session
+        provider_id: Provider/vendor identifier
+
+    Returns:
+        (row count, max id) of the provider's responses
+    """
+    count, max_id = session.exec(
+        select(func.count(), func.max(ResponseEntry.id)).where(ResponseEntry.provider_id == provider_id)
+    ).one()
+    return count, max_id
+
+
+def get_embedding_index(session: Session, provider_id: str) -> Optional[EmbeddingIndex]:
+    """
+    Get the in-memory index for a provider, loading it on first use.
+
+    The cached index is checked against the database's freshness token on
+    every call (one indexed aggregate query) and reloaded when it is stale.
+
+    Args:
+        session: Database session
+        provider_id: Provider/vendor identifier
+
+    Returns:
+        EmbeddingIndex, or None if the provider has too many rows to hold in memory
+    """
+    version = _version
+    token = _freshness_token(session, provider_id)
+
+    if provider_id in _indexes and _tokens.get(provider_id) == token:
+        return _indexes[provider_id]
+
+    count = token[0]
+
+    if count > IN_MEMORY_SEARCH_MAX_ROWS:
+        index = None
+    else:
+        result = session.exec(
+            select(
+                ResponseEntry.id,
+                ResponseEntry.provider_id,
+                ResponseEntry.question_id,
+                ResponseEntry.question_text,
+                ResponseEntry.answer,
+                ResponseEntry.evidence,
+                ResponseEntry.embedding
+            ).where(ResponseEntry.provider_id == provider_id).execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+
+        # Stream rows and pack each batch's embeddings into float32 right away,
+        # so the decoded Python float lists never exist for the whole corpus
+        responses = []
+        blocks = []
+        for rows in result.partitions():
+            responses.extend(_display_copy(row) for row in rows)
+            blocks.append(np.asarray([row.embedding for row in rows], dtype=np.float32))
+        index = EmbeddingIndex(responses, np.vstack(blocks) if blocks else [])
+
+    with _lock:
+        # Only cache if no write happened while loading
+        if _version == version:
+            _indexes[provider_id] = index
+            _tokens[provider_id] = token
+    return index
+
+
+def warm_embedding_indexes():
+    """
+    Load the in-memory index of every provider at startup, so the first
+    questionnaire for each provider doesn't pay for the load.
+    """
+    try:
+        with Session(engine) as session:
+            provider_ids = session.exec(select(ResponseEntry.provider_id).distinct()).all()
+            for provider_id in provider_ids:
+                get_embedding_index(session, provider_id)
+    except Exception as e:
+        print(f"Warning: Could not warm embedding indexes: {e}")
+
+
+def add_to_embedding_index(provider_id: str, responses: list[ResponseEntry]):
+    """
+    Append newly created responses to a provider's loaded index.
+
+    Providers whose index is not loaded are left alone; it is built from
+    the database on next use. Responses must have ids and loaded
+    attributes (e.g. after flush or refresh).
+
+    Args:
+        provider_id: Provider the responses belong to
+        responses: Created ResponseEntry rows with embeddings
+    """
+    global _version
+    copies = [_display_copy(response) for response in responses]
+    embeddings = [response.embedding for response in responses]
+
+    with _lock:
+        _version += 1
+        index = _indexes.get(provider_id)
+        if index is None:
+            return
+        if len(index.responses) + len(copies) > IN_MEMORY_SEARCH_MAX_ROWS:
+            # Grown past the limit: recheck the size on next use
+            del _indexes[provider_id]
+            _tokens.pop(provider_id, None)
+            return
+        index.append(copies, embeddings)
+
+        # Keep the token in step, so our own inserts don't force a reload
+        count, max_id = _tokens[provider_id]
+        new_ids = [copy.id for copy in copies]
+        if max_id is not None:
+            new_ids.append(max_id)
+        _tokens[provider_id] = (count + len(copies), max(new_ids))
+
+
+def invalidate_embedding_index(provider_id: Optional[str] = None):
+    """
+    Drop a provider's cached index so it is reloaded on next use.
+
+    Call after responses are deleted or changed.
+
+    Args:
+        provider_id: Provider to invalidate, or None to drop all indexes
+    """
+    global _version
+    with _lock:
+        _version += 1
+        if provider_id is None:
+            _indexes.clear()
+            _tokens.clear()
+        else:
+            _indexes.pop(provider_id, None)
+            _tokens.pop(provider_id, None)
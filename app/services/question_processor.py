@@ -7,12 +7,18 @@ Step 3: Semantic Search - Use AI embeddings (costs money)
 Step 4: Re-Ranker + Confidence Engine - Apply confidence thresholds
 """
 from datetime import datetime
+from sqlalchemy import Row, exists, insert, lambda_stmt
 from sqlmodel import Session, select
 from app.models import ResponseEntry, QuestionLink, MatchLog
 from app.schemas import Question, QuestionResult, ResponseData, Answer
-from .embedding import get_embedding, get_batch_embeddings
+from .embedding import get_embedding, get_batch_embeddings, embedding_cache_key_text
 from .text_utils import fuzzy_match_score
-from .semantic_search import search_similar_questions, search_similar_questions_fallback
+from .semantic_search import (
+    SemanticSearchResult,
+    search_similar_questions_batch,
+    search_similar_questions_batch_fallback,
+)
+from .embedding_index import EmbeddingIndex, get_embedding_index
 
 
 class QuestionProcessor:
@@ -29,6 +35,19 @@ class QuestionProcessor:
     MEDIUM_CONFIDENCE_THRESHOLD = 0.80
     FUZZY_MATCH_THRESHOLD = 0.90
 
+    # The re-ranker only consumes the best candidate, so the vector query
+    # returns a single row carrying both the match and its distance
+    SEMANTIC_TOP_K = 1
+
+    # Columns needed to answer a Step 1 / Step 2 match (no embedding)
+    DISPLAY_COLUMNS = (
+        ResponseEntry.id,
+        ResponseEntry.question_id,
+        ResponseEntry.question_text,
+        ResponseEntry.answer,
+        ResponseEntry.evidence
+    )
+
     def __init__(self, session: Session, client_id: str, provider_id: str, use_mysql_vector: bool = True):
         """
         Initialize question processor for a specific provider.
@@ -43,6 +62,18 @@ class QuestionProcessor:
         self.client_id = client_id  # Kept for potential future use
         self.provider_id = provider_id
         self.use_mysql_vector = use_mysql_vector
+        # MatchLog rows and HIGH confidence auto-links (keyed by
+        # new_question_id), written in one commit per request
+        self.pending_logs: list[dict] = []
+        self.pending_links: dict[str, QuestionLink] = {}
+        # Step 1 lookups loaded once per request, keyed by question ID
+        self.linked_responses: dict[str, Row] = {}
+        self.exact_responses: dict[str, Row] = {}
+        # Step 2 candidates when the provider has no in-memory index
+        self.fuzzy_candidates: list[Row] | None = None
+        # Provider's in-memory index, checked for freshness once per request
+        self.embedding_index: EmbeddingIndex | None = None
+        self.embedding_index_loaded = False
 
     async def process_single_question(self, question: Question) -> QuestionResult:
         """
@@ -54,7 +85,14 @@ class QuestionProcessor:
         Returns:
             QuestionResult with status and data
         """
+        return await self._commit_after(self._process_single_question(question))
+
+    async def _process_single_question(self, question: Question) -> QuestionResult:
+        """
+        Run one question through the chain, buffering MatchLog rows and auto-links.
+        """
         # Step 1: ID Match
+        self._prefetch_id_matches([question])
         result = await self._step1_id_match(question)
         if result:
             return result
@@ -64,9 +102,15 @@ class QuestionProcessor:
         if result:
             return result
 
-        # Step 3: Semantic Search
-        embedding = await get_embedding(question.text)
-        result = await self._step3_semantic_search(question, embedding)
+        # Step 3: Semantic Search (nothing to embed for if the provider has no responses)
+        if self._has_no_responses():
+            search_results = [[]]
+        else:
+            embedding = await get_embedding(question.text)
+            search_results = await self._step3_semantic_search([embedding])
+
+        # Step 4: Re-Ranker + Confidence Engine
+        result = await self._step4_confidence_engine(question, search_results[0])
         if result:
             return result
 
@@ -85,7 +129,8 @@ class QuestionProcessor:
 
         Implements the 4-step chain with batch optimization:
         - Steps 1 & 2 processed individually (no AI cost)
-        - Step 3 uses batch embedding for efficiency
+        - Step 3 uses batch embedding and a single batched vector query,
+          embedding and searching repeated question texts only once
 
         Args:
             questions: List of questions to process
@@ -93,97 +138,211 @@ class QuestionProcessor:
         Returns:
             List of QuestionResult objects
         """
-        results = []
+        return await self._commit_after(self._process_batch_questions(questions))
+
+    async def _process_batch_questions(self, questions: list[Question]) -> list[QuestionResult]:
+        """
+        Run the batch through the chain, buffering MatchLog rows and auto-links.
+        """
+        results: list[QuestionResult | None] = [None] * len(questions)
         questions_needing_semantic_search = []
-        question_indices = {}  # Map question to its original index
+        question_index_map: list[int] = []  # Original index of each semantic search question
 
         # Phase 1: Process Steps 1 & 2 (no AI cost)
+        self._prefetch_id_matches(questions)
         for idx, question in enumerate(questions):
             # Step 1: ID Match
             result = await self._step1_id_match(question)
             if result:
-                results.append(result)
+                results[idx] = result
                 continue
 
             # Step 2: Fuzzy Match
             result = await self._step2_fuzzy_match(question)
             if result:
-                results.append(result)
+                results[idx] = result
                 continue
 
             # Need semantic search
             questions_needing_semantic_search.append(question)
-            question_indices[id(question)] = len(results)
-            results.append(None)  # Placeholder
+            question_index_map.append(idx)
 
         # Phase 2: Batch semantic search for remaining questions
         if questions_needing_semantic_search:
-            texts_to_embed = [q.text for q in questions_needing_semantic_search]
-            embeddings = await get_batch_embeddings(texts_to_embed)
+            # Embed and search each distinct text once (repeats are common in
+            # compliance questionnaires); map each question to its text's slot
+            unique_texts: dict[str, int] = {}
+            texts_to_embed = []
+            text_index_map: list[int] = []
+            for question in questions_needing_semantic_search:
+                # Same normalization as the embedding cache, so texts it
+                # would treat as one are embedded and searched once here
+                key = embedding_cache_key_text(question.text)
+                if key not in unique_texts:
+                    unique_texts[key] = len(texts_to_embed)
+                    texts_to_embed.append(question.text)
+                text_index_map.append(unique_texts[key])
+
+            if self._has_no_responses():
+                # Empty corpus: every question is NO_MATCH, skip the API call
+                batch_search_results = [[] for _ in texts_to_embed]
+            else:
+                embeddings = await get_batch_embeddings(texts_to_embed)
+
+                # One vector query for the whole batch
+                batch_search_results = await self._step3_semantic_search(embeddings)
 
             for idx, question in enumerate(questions_needing_semantic_search):
-                embedding = embeddings[idx]
-                result = await self._step3_semantic_search(question, embedding)
+                result = await self._step4_confidence_engine(
+                    question, batch_search_results[text_index_map[idx]]
+                )
 
-                # Replace placeholder with result
-                original_idx = question_indices[id(question)]
-                results[original_idx] = result
+                # Fill the slot of the original question
+                results[question_index_map[idx]] = result
 
         return results
 
+    async def _commit_after(self, processing):
+        """
+        Await a processing coroutine, then write its buffered rows.
+
+        If processing fails, nothing is written: the session is rolled back
+        and the buffers dropped, so the original error propagates unmasked
+        and no partial logs are committed.
+
+        Args:
+            processing: Coroutine running the fallback chain
+
+        Returns:
+            The coroutine's result
+        """
+        try:
+            result = await processing
+        except BaseException:
+            self.session.rollback()
+            self.pending_logs = []
+            self.pending_links.clear()
+            raise
+
+        # MatchLog rows and auto-links are written in one commit per request
+        self._flush_pending_writes()
+        return result
+
+    def _flush_pending_writes(self):
+        """
+        Write all buffered MatchLog entries and HIGH confidence auto-links
+        in a single commit.
+
+        Log entries go through one executemany INSERT (no primary keys are
+        fetched back, as nothing reads them) instead of a commit per question.
+        """
+        if not self.pending_logs and not self.pending_links:
+            return
+
+        if self.pending_logs:
+            self.session.execute(insert(MatchLog), self.pending_logs)
+            self.pending_logs = []
+        self.session.add_all(list(self.pending_links.values()))
+        self.session.commit()
+        self.pending_links.clear()
+
+    def _prefetch_id_matches(self, questions: list[Question]):
+        """
+        Load saved links and exact ID matches for all questions up front.
+
+        Replaces two to three queries per question with two per request.
+        Only the display columns are selected, as plain rows, so they are not
+        expired (and re-fetched) by the end-of-request commit.
+
+        Args:
+            questions: Questions about to go through Step 1
+        """
+        provider_id = self.provider_id
+        question_ids = list({str(q.id) for q in questions})
+
+        # Saved links and their canonical responses in one round-trip: the
+        # link side is read from idx_qlink_lookup, the response by primary key
+        self.linked_responses = {
+            row.new_question_id: row
+            for row in self.session.exec(lambda_stmt(lambda: select(
+                QuestionLink.new_question_id,
+                *QuestionProcessor.DISPLAY_COLUMNS
+            ).join(
+                ResponseEntry, QuestionLink.linked_response_id == ResponseEntry.id
+            ).where(
+                QuestionLink.provider_id == provider_id,
+                QuestionLink.new_question_id.in_(question_ids)
+            ))).all()
+        }
+
+        self.exact_responses = {
+            entry.question_id: entry
+            for entry in self.session.exec(lambda_stmt(lambda: select(*QuestionProcessor.DISPLAY_COLUMNS).where(
+                ResponseEntry.provider_id == provider_id,
+                ResponseEntry.question_id.in_(question_ids)
+            ))).all()
+        }
+
     async def _step1_id_match(self, question: Question) -> QuestionResult | None:
         """
         Step 1: Check for saved link or exact ID match.
 
+        Uses the lookups loaded by _prefetch_id_matches.
+
         Returns:
             QuestionResult if match found, None otherwise
         """
-        # Check for saved link
-        link_query = select(QuestionLink).where(
-            QuestionLink.provider_id == self.provider_id,
-            QuestionLink.new_question_id == str(question.id)
+        # Check for saved link, then for exact ID match
+        response_entry = (
+            self.linked_responses.get(str(question.id))
+            or self.exact_responses.get(str(question.id))
         )
-        existing_link = self.session.exec(link_query).first()
-
-        if existing_link:
-            response_entry = self.session.get(ResponseEntry, existing_link.linked_response_id)
-            if response_entry:
-                return await self._log_and_return(
-                    question_id=question.id,
-                    match_method="ID",
-                    confidence_score=1.0,
-                    final_status="LINKED",
-                    response_data=ResponseData(
-                        answer=Answer(**response_entry.answer),
-                        evidence=response_entry.evidence,
-                        canonical_question_text=response_entry.question_text,
-                        similarity_score=1.0
-                    )
-                )
-
-        # Check for exact ID match
-        exact_match_query = select(ResponseEntry).where(
-            ResponseEntry.provider_id == self.provider_id,
-            ResponseEntry.question_id == str(question.id)
-        )
-        exact_match = self.session.exec(exact_match_query).first()
 
-        if exact_match:
+        if response_entry:
             return await self._log_and_return(
                 question_id=question.id,
                 match_method="ID",
                 confidence_score=1.0,
                 final_status="LINKED",
-                response_data=ResponseData(
-                    answer=Answer(**exact_match.answer),
-                    evidence=exact_match.evidence,
-                    canonical_question_text=exact_match.question_text,
-                    similarity_score=1.0
-                )
+                response_data=self._response_data(response_entry, 1.0)
             )
 
         return None
 
+    def _embedding_index(self) -> EmbeddingIndex | None:
+        """
+        Get the provider's in-memory index, resolved once per request.
+
+        Returns:
+            EmbeddingIndex, or None if the provider is searched in MySQL
+        """
+        if not self.embedding_index_loaded:
+            self.embedding_index = get_embedding_index(self.session, self.provider_id)
+            self.embedding_index_loaded = True
+        return self.embedding_index
+
+    def _fuzzy_candidates(self) -> list:
+        """
+        Get the provider's responses to fuzzy match against, without embeddings.
+
+        Served from the provider's in-memory embedding index when it is
+        loaded; otherwise the display columns are queried once per request.
+
+        Returns:
+            ResponseEntry objects or rows with the display columns
+        """
+        index = self._embedding_index()
+        if index is not None:
+            return index.responses
+
+        if self.fuzzy_candidates is None:
+            provider_id = self.provider_id
+            statement = lambda_stmt(lambda: select(*QuestionProcessor.DISPLAY_COLUMNS).where(
+                ResponseEntry.provider_id == provider_id
+            ))
+            self.fuzzy_candidates = self.session.exec(statement).all()
+        return self.fuzzy_candidates
+
     async def _step2_fuzzy_match(self, question: Question) -> QuestionResult | None:
         """
         Step 2: Normalize text and perform fuzzy matching using Levenshtein distance.
@@ -193,9 +352,8 @@ class QuestionProcessor:
         Returns:
             QuestionResult if fuzzy match found, None otherwise
         """
-        # Load all responses for this client-vendor pair
-        statement = select(ResponseEntry).where(ResponseEntry.provider_id == self.provider_id)
-        all_responses = self.session.exec(statement).all()
+        # All responses for this provider (in-memory, not re-queried per question)
+        all_responses = self._fuzzy_candidates()
 
         if not all_responses:
             return None
@@ -217,50 +375,79 @@ class QuestionProcessor:
                 match_method="FUZZY",
                 confidence_score=best_score,
                 final_status="LINKED",
-                response_data=ResponseData(
-                    answer=Answer(**best_match.answer),
-                    evidence=best_match.evidence,
-                    canonical_question_text=best_match.question_text,
-                    similarity_score=best_score
-                )
+                response_data=self._response_data(best_match, best_score)
             )
 
         return None
 
+    def _has_no_responses(self) -> bool:
+        """
+        Check whether the provider has no saved responses at all.
+
+        Asks the database (an EXISTS on the provider_id index) rather than
+        a cached index, so responses saved by any process are seen at once.
+
+        Returns:
+            True if Step 3 cannot match anything for this provider
+        """
+        provider_id = self.provider_id
+        statement = lambda_stmt(lambda: select(exists().where(ResponseEntry.provider_id == provider_id)))
+        return not self.session.exec(statement).scalar()
+
     async def _step3_semantic_search(
         self,
-        question: Question,
-        embedding: list[float]
-    ) -> QuestionResult:
+        embeddings: list[list[float]]
+    ) -> list[list[SemanticSearchResult]]:
         """
-        Step 3 & 4: Semantic search + Re-Ranker + Confidence Engine.
+        Step 3: Semantic search for a batch of pre-computed embeddings.
 
-        Uses AI embeddings to find similar questions, then applies confidence logic.
+        Small corpora are searched in memory with one float32 matrix product
+        and no database round-trip. Larger ones search all query vectors in a
+        single LATERAL query; the Python-based fallback is used if MySQL
+        vector search fails.
 
         Args:
-            question: Question to process
-            embedding: Pre-computed embedding vector
+            embeddings: Pre-computed embedding vectors
 
         Returns:
-            QuestionResult with appropriate status
+            Search results per embedding (top match + distance in one row)
         """
-        # Perform semantic search (top 5)
+        index = self._embedding_index()
+        if index is not None:
+            return index.search(embeddings, top_k=self.SEMANTIC_TOP_K)
+
         try:
             if self.use_mysql_vector:
-                search_results = await search_similar_questions(
-                    self.session, self.provider_id, embedding, top_k=5
-                )
-            else:
-                search_results = await search_similar_questions_fallback(
-                    self.session, self.provider_id, embedding, top_k=5
+                return await search_similar_questions_batch(
+                    self.session, self.provider_id, embeddings, top_k=self.SEMANTIC_TOP_K
                 )
+            return await search_similar_questions_batch_fallback(
+                self.session, self.provider_id, embeddings, top_k=self.SEMANTIC_TOP_K
+            )
         except Exception as e:
             # Fallback to Python-based similarity if MySQL vector fails
             print(f"MySQL vector search failed, using fallback: {e}")
-            search_results = await search_similar_questions_fallback(
-                self.session, self.provider_id, embedding, top_k=5
+            return await search_similar_questions_batch_fallback(
+                self.session, self.provider_id, embeddings, top_k=self.SEMANTIC_TOP_K
             )
 
+    async def _step4_confidence_engine(
+        self,
+        question: Question,
+        search_results: list[SemanticSearchResult]
+    ) -> QuestionResult:
+        """
+        Step 4: Re-Ranker + Confidence Engine.
+
+        Applies the 3-tier confidence logic to the semantic search results.
+
+        Args:
+            question: Question to process
+            search_results: Step 3 results for this question
+
+        Returns:
+            QuestionResult with appropriate status
+        """
         if not search_results:
             return await self._log_and_return(
                 question_id=question.id,
@@ -276,26 +463,19 @@ class QuestionProcessor:
 
         # Step 4: Confidence Engine - Apply 3-tier logic
         if similarity_score > self.HIGH_CONFIDENCE_THRESHOLD:
-            # HIGH CONFIDENCE: Auto-link
-            auto_link = QuestionLink(
+            # HIGH CONFIDENCE: Auto-link (committed once per request)
+            self.pending_links[str(question.id)] = QuestionLink(
                 provider_id=self.provider_id,
                 new_question_id=str(question.id),
                 linked_response_id=top_match.response.id
             )
-            self.session.add(auto_link)
-            self.session.commit()
 
             return await self._log_and_return(
                 question_id=question.id,
                 match_method="SEMANTIC",
                 confidence_score=similarity_score,
                 final_status="LINKED",
-                response_data=ResponseData(
-                    answer=Answer(**top_match.response.answer),
-                    evidence=top_match.response.evidence,
-                    canonical_question_text=top_match.response.question_text,
-                    similarity_score=similarity_score
-                )
+                response_data=self._response_data(top_match.response, similarity_score)
             )
 
         elif similarity_score >= self.MEDIUM_CONFIDENCE_THRESHOLD:
@@ -305,12 +485,7 @@ class QuestionProcessor:
                 match_method="SEMANTIC",
                 confidence_score=similarity_score,
                 final_status="CONFIRMATION_REQUIRED",
-                response_data=ResponseData(
-                    answer=Answer(**top_match.response.answer),
-                    evidence=top_match.response.evidence,
-                    canonical_question_text=top_match.response.question_text,
-                    similarity_score=similarity_score
-                )
+                response_data=self._response_data(top_match.response, similarity_score)
             )
 
         else:
@@ -332,7 +507,7 @@ class QuestionProcessor:
         response_data: ResponseData | None
     ) -> QuestionResult:
         """
-        Log the match result to MatchLog table and return QuestionResult.
+        Buffer the match result for the MatchLog table and return QuestionResult.
 
         Args:
             question_id: ID of the question (can be int or str)
@@ -344,21 +519,42 @@ class QuestionProcessor:
         Returns:
             QuestionResult object
         """
-        # Create log entry
-        log_entry = MatchLog(
-            question_id=str(question_id),  # Convert to string for storage
-            match_method=match_method,
-            confidence_score=confidence_score,
-            final_status=final_status,
-            timestamp=datetime.utcnow(),
-            provider_id=self.provider_id
-        )
-        self.session.add(log_entry)
-        self.session.commit()
-
-        # Return result
-        return QuestionResult(
+        # Buffer log entry (inserted by _flush_pending_writes)
+        self.pending_logs.append({
+            "question_id": str(question_id),  # Convert to string for storage
+            "match_method": match_method,
+            "confidence_score": confidence_score,
+            "final_status": final_status,
+            "timestamp": datetime.utcnow(),
+            "provider_id": self.provider_id
+        })
+
+        # Return result (built from already-validated data, so skip validation)
+        return QuestionResult.model_construct(
             id=question_id,  # Keep original type (int or str)
             status=final_status,
             data=response_data
         )
+
+    @staticmethod
+    def _response_data(response, similarity_score: float) -> ResponseData:
+        """
+        Build the ResponseData for a matched response.
+
+        Uses model_construct: the answer was validated when the response was
+        created, so re-running Pydantic validation for every question in a
+        large questionnaire is pure overhead.
+
+        Args:
+            response: Matched ResponseEntry or row with the display columns
+            similarity_score: Score to report for the match
+
+        Returns:
+            ResponseData for the QuestionResult
+        """
+        return ResponseData.model_construct(
+            answer=Answer.model_construct(**response.answer),
+            evidence=response.evidence,
+            canonical_question_text=response.question_text,
+            similarity_score=similarity_score
+        )
@@ -1,10 +1,20 @@
 """
 Semantic search service using MySQL 8+ native vector functions.
 """
-from typing import List, Tuple
+import orjson
+from typing import List, Optional, Tuple
 from sqlmodel import Session, text
 from app.models import ResponseEntry
 
+# Column the vector queries read: the native VECTOR copy added by
+# migrate_to_vector_column.py if present, else the JSON embedding column
+_vector_column: Optional[str] = None
+
+# Query vectors sent per batched search statement. Each 1024-float vector is
+# about 20 KB of JSON, so 128 keep a statement near 2.6 MB, under MySQL's
+# smallest default max_allowed_packet (4 MB on 5.7; 64 MB on 8.0)
+SEARCH_QUERIES_PER_STATEMENT = 128
+
 
 class SemanticSearchResult:
     """Result from semantic search."""
@@ -13,6 +23,64 @@ class SemanticSearchResult:
         self.similarity_score = similarity_score
 
 
+def _get_vector_column(session: Session) -> str:
+    """
+    Get the column to compute vector distances on (detected once per process).
+
+    A native VECTOR column is compared as stored; the JSON embedding column
+    has to be converted row by row on every query.
+
+    Args:
+        session: Database session
+
+    Returns:
+        "embedding_vec" if the native VECTOR column exists, else "embedding"
+    """
+    global _vector_column
+    if _vector_column is None:
+        has_vector_column = session.execute(text("""
+            SELECT COUNT(*)
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+            AND table_name = 'responseentry'
+            AND column_name = 'embedding_vec'
+        """)).scalar() > 0
+        _vector_column = "embedding_vec" if has_vector_column else "embedding"
+    return _vector_column
+
+
+def _row_to_result(row) -> SemanticSearchResult:
+    """
+    Build a SemanticSearchResult from a vector query row.
+
+    The vector queries don't select the embedding column: only the answer
+    fields are needed downstream, and skipping it keeps each result row
+    a few hundred bytes instead of ~4 KB.
+
+    Args:
+        row: Result row with ResponseEntry display columns and distance_score
+
+    Returns:
+        SemanticSearchResult with the reconstructed ResponseEntry (no embedding)
+    """
+    # Reconstruct ResponseEntry from row
+    response = ResponseEntry(
+        id=row.id,
+        provider_id=row.provider_id,
+        question_id=row.question_id,
+        question_text=row.question_text,
+        answer=orjson.loads(row.answer) if isinstance(row.answer, (str, bytes)) else row.answer,
+        evidence=row.evidence
+    )
+
+    # Convert distance to similarity (1 - distance)
+    # MySQL cosine distance is in [0, 2], where 0 = identical
+    # We convert to similarity score in [0, 1], where 1 = identical
+    similarity_score = 1.0 - (row.distance_score / 2.0)
+
+    return SemanticSearchResult(response, similarity_score)
+
+
 async def search_similar_questions(
     session: Session,
     provider_id: str,
@@ -35,13 +103,13 @@ async def search_similar_questions(
         List of SemanticSearchResult objects ordered by similarity (best first)
     """
     # Convert embedding to JSON string for MySQL
-    import json
-    embedding_json = json.dumps(query_embedding)
+    embedding_json = orjson.dumps(query_embedding).decode()
 
     # MySQL query using VECTOR_COSINE_DISTANCE
     # Note: MySQL's VECTOR_COSINE_DISTANCE returns distance (lower = more similar)
     # We'll convert it to similarity score (higher = more similar) by doing (1 - distance)
-    query = text("""
+    vector_column = _get_vector_column(session)
+    query = text(f"""
         SELECT
             id,
             provider_id,
@@ -49,8 +117,7 @@ async def search_similar_questions(
             question_text,
             answer,
             evidence,
-            embedding,
-            VECTOR_COSINE_DISTANCE(embedding, CAST(:embedding AS VECTOR)) AS distance_score
+            VECTOR_COSINE_DISTANCE({vector_column}, CAST(:embedding AS VECTOR)) AS distance_score
         FROM
             responseentry
         WHERE
@@ -71,25 +138,92 @@ async def search_similar_questions(
     )
 
     # Process results
-    search_results = []
-    for row in result:
-        # Reconstruct ResponseEntry from row
-        response = ResponseEntry(
-            id=row.id,
-            provider_id=row.provider_id,
-            question_id=row.question_id,
-            question_text=row.question_text,
-            answer=json.loads(row.answer) if isinstance(row.answer, str) else row.answer,
-            evidence=row.evidence,
-            embedding=json.loads(row.embedding) if isinstance(row.embedding, str) else row.embedding
-        )
+    return [_row_to_result(row) for row in result]
+
+
+async def search_similar_questions_batch(
+    session: Session,
+    provider_id: str,
+    query_embeddings: List[List[float]],
+    top_k: int = 1
+) -> List[List[SemanticSearchResult]]:
+    """
+    Search for similar questions for many query vectors in a single query.
+
+    The query vectors are unpacked server-side with JSON_TABLE and each one
+    drives a LATERAL top-k VECTOR_COSINE_DISTANCE subquery (MySQL 8.0.14+),
+    so a batch costs one round-trip per SEARCH_QUERIES_PER_STATEMENT
+    questions instead of one per question. Distances use the native
+    embedding_vec column when it exists.
+
+    Args:
+        session: Database session
+        provider_id: Provider/vendor identifier for multi-tenant filtering
+        query_embeddings: Query vector embeddings (1024 dimensions each)
+        top_k: Number of top results to return per query (default: 1)
 
-        # Convert distance to similarity (1 - distance)
-        # MySQL cosine distance is in [0, 2], where 0 = identical
-        # We convert to similarity score in [0, 1], where 1 = identical
-        similarity_score = 1.0 - (row.distance_score / 2.0)
+    Returns:
+        One list of SemanticSearchResult objects per query embedding,
+        in input order, each ordered by similarity (best first)
+    """
+    if not query_embeddings:
+        return []
 
-        search_results.append(SemanticSearchResult(response, similarity_score))
+    vector_column = _get_vector_column(session)
+    query = text(f"""
+        SELECT
+            q.query_idx,
+            r.id,
+            r.provider_id,
+            r.question_id,
+            r.question_text,
+            r.answer,
+            r.evidence,
+            r.distance_score
+        FROM
+            JSON_TABLE(
+                :embeddings, '$[*]'
+                COLUMNS (query_idx FOR ORDINALITY, query_embedding JSON PATH '$')
+            ) AS q,
+            LATERAL (
+                SELECT
+                    id,
+                    provider_id,
+                    question_id,
+                    question_text,
+                    answer,
+                    evidence,
+                    VECTOR_COSINE_DISTANCE({vector_column}, CAST(q.query_embedding AS VECTOR)) AS distance_score
+                FROM
+                    responseentry
+                WHERE
+                    provider_id = :provider_id
+                ORDER BY
+                    distance_score ASC
+                LIMIT :top_k
+            ) AS r
+        ORDER BY
+            q.query_idx, r.distance_score ASC
+    """)
+
+    search_results = [[] for _ in query_embeddings]
+
+    # Chunked so the JSON parameter stays within max_allowed_packet
+    for start in range(0, len(query_embeddings), SEARCH_QUERIES_PER_STATEMENT):
+        chunk = query_embeddings[start:start + SEARCH_QUERIES_PER_STATEMENT]
+        result = session.execute(
+            query,
+            {
+                # orjson serializes 1024-float lists far faster than json
+                "embeddings": orjson.dumps(chunk).decode(),
+                "provider_id": provider_id,
+                "top_k": top_k
+            }
+        )
+
+        # JSON_TABLE ordinality is 1-based
+        for row in result:
+            search_results[start + row.query_idx - 1].append(_row_to_result(row))
 
     return search_results
 
@@ -101,10 +235,10 @@ async def search_similar_questions_fallback(
     top_k: int = 5
 ) -> List[SemanticSearchResult]:
     """
-    Fallback semantic search using Python-based cosine similarity.
+    Fallback semantic search using NumPy cosine similarity.
 
     This is a fallback for MySQL versions that don't support VECTOR_COSINE_DISTANCE.
-    It loads all vectors into memory and computes similarity in Python.
+    It loads all vectors into memory and scores them with one matrix product.
 
     Args:
         session: Database session
@@ -115,30 +249,40 @@ async def search_similar_questions_fallback(
     Returns:
         List of SemanticSearchResult objects ordered by similarity (best first)
     """
-    from sqlmodel import select
-    from .embedding import cosine_similarity
+    search_results = await search_similar_questions_batch_fallback(
+        session, provider_id, [query_embedding], top_k=top_k
+    )
+    return search_results[0]
 
-    # Load all responses for the provider
-    statement = select(ResponseEntry).where(ResponseEntry.provider_id == provider_id)
-    all_responses = session.exec(statement).all()
 
-    if not all_responses:
-        return []
+async def search_similar_questions_batch_fallback(
+    session: Session,
+    provider_id: str,
+    query_embeddings: List[List[float]],
+    top_k: int = 1
+) -> List[List[SemanticSearchResult]]:
+    """
+    Fallback batch semantic search using NumPy cosine similarity.
+
+    Loads the provider's vectors once into a normalized float32 matrix and
+    scores every query against it in a single matmul.
 
-    # Calculate similarities in Python
-    similarities = [
-        (response, cosine_similarity(query_embedding, response.embedding))
-        for response in all_responses
-    ]
+    Args:
+        session: Database session
+        provider_id: Provider/vendor identifier for multi-tenant filtering
+        query_embeddings: Query vector embeddings (1024 dimensions each)
+        top_k: Number of top results to return per query (default: 1)
 
-    # Sort by similarity (descending) and take top_k
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    top_results = similarities[:top_k]
+    Returns:
+        One list of SemanticSearchResult objects per query embedding,
+        in input order, each ordered by similarity (best first)
+    """
+    from sqlmodel import select
+    from .embedding_index import EmbeddingIndex
 
-    # Convert to SemanticSearchResult objects
-    search_results = [
-        SemanticSearchResult(response, score)
-        for response, score in top_results
-    ]
+    # Load all responses for the provider
+    statement = select(ResponseEntry).where(ResponseEntry.provider_id == provider_id)
+    all_responses = session.exec(statement).all()
 
-    return search_results
+    index = EmbeddingIndex(all_responses, [response.embedding for response in all_responses])
+    return index.search(query_embeddings, top_k=top_k)
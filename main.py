@@ -18,7 +18,7 @@ Architecture:
 """
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.services import init_db, init_openai_client
+from app.services import init_db, warm_connection_pool, warm_embedding_indexes, init_openai_client
 from app.api import questionnaire_router, responses_router, admin_router
 
 
@@ -30,6 +30,8 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Starting application...")
     init_db()
+    warm_connection_pool()
+    warm_embedding_indexes()
     init_openai_client()
     print("Application ready!")
 
@@ -100,11 +102,11 @@ async def health_check():
 from typing import Optional
 from fastapi import Depends
 from sqlmodel import Session
-from app.schemas import QuestionnaireInput, BatchCreateInput
+from app.schemas import QuestionnaireInput, QuestionnaireOutput, BatchCreateInput
 from app.services import get_session
 
 
-@app.post("/process-questionnaire")
+@app.post("/process-questionnaire", response_model=QuestionnaireOutput)
 async def process_questionnaire_legacy(
     questionnaire: QuestionnaireInput,
     session: Session = Depends(get_session)
@@ -114,7 +116,7 @@ async def process_questionnaire_legacy(
     return await process_questionnaire(questionnaire, session)
 
 
-@app.post("/batch-process-questionnaire")
+@app.post("/batch-process-questionnaire", response_model=QuestionnaireOutput)
 async def batch_process_questionnaire_legacy(
     questionnaire: QuestionnaireInput,
     session: Session = Depends(get_session)
@@ -149,40 +151,46 @@ async def batch_create_responses_legacy(
 
 
 @app.get("/responses")
-async def list_responses_legacy(
+def list_responses_legacy(
     vendor_id: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
     session: Session = Depends(get_session)
 ):
     """Legacy endpoint - redirects to new path."""
     from app.api.responses import list_responses
-    return await list_responses(vendor_id, session)
+    return list_responses(provider_id=vendor_id, limit=limit, offset=offset, session=session)
 
 
 @app.get("/links")
-async def list_links_legacy(session: Session = Depends(get_session)):
+def list_links_legacy(
+    limit: int = 100,
+    offset: int = 0,
+    session: Session = Depends(get_session)
+):
     """Legacy endpoint - redirects to new path."""
     from app.api.admin import list_links
-    return await list_links(session)
+    return list_links(limit=limit, offset=offset, session=session)
 
 
 @app.delete("/responses/{response_id}")
-async def delete_response_legacy(
+def delete_response_legacy(
     response_id: int,
     session: Session = Depends(get_session)
 ):
     """Legacy endpoint - redirects to new path."""
     from app.api.responses import delete_response
-    return await delete_response(response_id, session)
+    return delete_response(response_id, session)
 
 
 @app.delete("/links/{link_id}")
-async def delete_link_legacy(
+def delete_link_legacy(
     link_id: int,
     session: Session = Depends(get_session)
 ):
     """Legacy endpoint - redirects to new path."""
     from app.api.admin import delete_link
-    return await delete_link(link_id, session)
+    return delete_link(link_id, session)
 
 
 if __name__ == "__main__":
@@ -10,6 +10,11 @@ Changes:
 3. QuestionLink: vendor_id (str) -> client_vendor_id (int, FK)
 4. MatchLog: vendor_id (str) -> client_vendor_id (int, FK)
 
+Step order matters for speed on large tables: the new columns are populated
+before any index on them exists (so the bulk UPDATEs don't maintain indexes
+row by row), indexes are then built in one pass each, and foreign keys come
+last so they reuse those indexes instead of creating their own.
+
 Prerequisites:
 - Backup your database before running this script
 - Ensure the clientvendor table exists with columns: id, clientid, providerid
@@ -20,8 +25,8 @@ Usage:
 """
 
 import os
-import json
 from dotenv import load_dotenv
+from sqlalchemy.exc import OperationalError, ProgrammingError, NotSupportedError
 from sqlmodel import create_engine, Session, text
 
 # Load environment variables
@@ -32,7 +37,11 @@ if not DATABASE_URL:
     raise ValueError("DATABASE_URL not found in environment variables")
 
 # Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+# Statement logging is opt-in (SQL_ECHO=1), as in app/services/database.py
+engine = create_engine(DATABASE_URL, echo=os.getenv('SQL_ECHO') == '1')
+
+# Rows converted per UPDATE/commit in migrate_answer_format
+ANSWER_BATCH_SIZE = 5000
 
 
 def run_migration():
@@ -63,14 +72,14 @@ def run_migration():
             print("\n[Step 5/8] Dropping old answer_text column...")
             drop_answer_text_column(session)
 
-            # Step 6: Add foreign key constraints
-            print("\n[Step 6/8] Adding foreign key constraints...")
-            add_foreign_keys(session)
-
-            # Step 7: Update indexes
-            print("\n[Step 7/8] Updating indexes...")
+            # Step 6: Update indexes
+            print("\n[Step 6/8] Updating indexes...")
             update_indexes(session)
 
+            # Step 7: Add foreign key constraints
+            print("\n[Step 7/8] Adding foreign key constraints...")
+            add_foreign_keys(session)
+
             # Step 8: Verify migration
             print("\n[Step 8/8] Verifying migration...")
             verify_migration(session)
@@ -86,127 +95,139 @@ def run_migration():
             raise
 
 
+def alter_table(session: Session, statement: str, algorithm: str):
+    """Run an ALTER TABLE with an ALGORITHM/LOCK hint, falling back to MySQL's default."""
+    try:
+        session.exec(text(f"{statement.rstrip()}, {algorithm}"))
+    except (OperationalError, ProgrammingError, NotSupportedError) as e:
+        # Older server without the ALGORITHM=INSTANT syntax (1064, ProgrammingError),
+        # or a change the requested algorithm can't do in place (1235/1845/1846)
+        print(f"  {algorithm} not supported ({e.orig}), retrying with default algorithm")
+        session.exec(text(statement))
+
+
 def add_new_columns(session: Session):
     """Add new columns to tables."""
-    # Add client_vendor_id to responseentry
-    session.exec(text("""
-        ALTER TABLE responseentry
-        ADD COLUMN client_vendor_id INT NULL
-    """))
-
-    # Add answer column to responseentry (JSON format)
-    session.exec(text("""
+    # Add client_vendor_id and answer (JSON format) to responseentry in one ALTER
+    alter_table(session, """
         ALTER TABLE responseentry
+        ADD COLUMN client_vendor_id INT NULL,
         ADD COLUMN answer LONGTEXT NULL
-    """))
+    """, "ALGORITHM=INSTANT")
 
     # Add client_vendor_id to questionlink
-    session.exec(text("""
+    alter_table(session, """
         ALTER TABLE questionlink
         ADD COLUMN client_vendor_id INT NULL
-    """))
+    """, "ALGORITHM=INSTANT")
 
     # Add client_vendor_id to matchlog
-    session.exec(text("""
+    alter_table(session, """
         ALTER TABLE matchlog
         ADD COLUMN client_vendor_id INT NULL
-    """))
+    """, "ALGORITHM=INSTANT")
 
     session.commit()
     print("✓ New columns added successfully")
 
 
 def migrate_vendor_ids(session: Session):
-    """Migrate vendor_id string values to client_vendor_id foreign keys."""
+    """Migrate vendor_id string values to client_vendor_id foreign keys (set-based)."""
 
-    # Get all unique vendor_ids from responseentry
-    vendor_ids_result = session.exec(text("""
-        SELECT DISTINCT vendor_id FROM responseentry
-    """))
-    vendor_ids = [row[0] for row in vendor_ids_result]
+    # Count unique vendor_ids in responseentry
+    vendor_count = session.exec(text("""
+        SELECT COUNT(DISTINCT vendor_id) FROM responseentry
+    """)).first()[0]
 
-    print(f"  Found {len(vendor_ids)} unique vendor IDs to migrate")
+    print(f"  Found {vendor_count} unique vendor IDs to migrate")
 
-    # For each vendor_id, create or find a clientvendor entry
+    # Create a clientvendor entry for every vendor_id that has none
     # Assuming vendor_id maps to both clientid and providerid for this migration
     # You may need to adjust this logic based on your data structure
-    for vendor_id in vendor_ids:
-        # Check if clientvendor entry exists
-        check_query = text("""
-            SELECT id FROM clientvendor
-            WHERE clientid = :vendor_id AND providerid = :vendor_id
-        """)
-        result = session.exec(check_query, {"vendor_id": vendor_id}).first()
-
-        if result:
-            client_vendor_id = result[0]
-        else:
-            # Create new clientvendor entry
-            insert_query = text("""
-                INSERT INTO clientvendor (clientid, providerid)
-                VALUES (:vendor_id, :vendor_id)
-            """)
-            session.exec(insert_query, {"vendor_id": vendor_id})
-            session.commit()
-
-            # Get the inserted ID
-            client_vendor_id = session.exec(text("SELECT LAST_INSERT_ID()")).first()[0]
-
-        # Update responseentry
-        session.exec(text("""
-            UPDATE responseentry
-            SET client_vendor_id = :client_vendor_id
-            WHERE vendor_id = :vendor_id
-        """), {"client_vendor_id": client_vendor_id, "vendor_id": vendor_id})
+    result = session.exec(text("""
+        INSERT INTO clientvendor (clientid, providerid)
+        SELECT DISTINCT r.vendor_id, r.vendor_id
+        FROM responseentry r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM clientvendor c
+            WHERE c.clientid = r.vendor_id AND c.providerid = r.vendor_id
+        )
+    """))
+    print(f"  Created {result.rowcount} clientvendor entries")
 
-        # Update questionlink
-        session.exec(text("""
-            UPDATE questionlink
-            SET client_vendor_id = :client_vendor_id
-            WHERE vendor_id = :vendor_id
-        """), {"client_vendor_id": client_vendor_id, "vendor_id": vendor_id})
+    # Resolve each vendor's clientvendor entry (lowest id if duplicated) once,
+    # into a keyed temporary table the three UPDATEs look up by primary key.
+    # Temporary tables are per connection, so this runs before the commit.
+    session.exec(text("""
+        CREATE TEMPORARY TABLE vendor_map (
+            vendor_id VARCHAR(255) NOT NULL PRIMARY KEY,
+            client_vendor_id INT NOT NULL
+        )
+    """))
+    session.exec(text("""
+        INSERT INTO vendor_map (vendor_id, client_vendor_id)
+        SELECT clientid, MIN(id)
+        FROM clientvendor
+        WHERE clientid = providerid
+        GROUP BY clientid
+    """))
 
-        # Update matchlog
-        session.exec(text("""
-            UPDATE matchlog
-            SET client_vendor_id = :client_vendor_id
-            WHERE vendor_id = :vendor_id
-        """), {"client_vendor_id": client_vendor_id, "vendor_id": vendor_id})
+    # Point every table at its vendor's clientvendor entry; rows already
+    # migrated by an earlier (interrupted) run are skipped
+    for table_name in ("responseentry", "questionlink", "matchlog"):
+        session.exec(text(f"""
+            UPDATE {table_name} t
+            JOIN vendor_map m ON m.vendor_id = t.vendor_id
+            SET t.client_vendor_id = m.client_vendor_id
+            WHERE t.client_vendor_id IS NULL
+        """))
+
+    session.exec(text("DROP TEMPORARY TABLE vendor_map"))
 
     session.commit()
     print("✓ Vendor IDs migrated successfully")
 
 
 def migrate_answer_format(session: Session):
-    """Migrate answer_text to answer JSON format."""
-
-    # Get all responses with answer_text
-    result = session.exec(text("""
-        SELECT id, answer_text FROM responseentry
-    """))
+    """Migrate answer_text to answer JSON format (built server-side with JSON_OBJECT)."""
 
+    # MySQL builds each answer in place, no rows leave the server. The table
+    # is walked in primary key ranges of ANSWER_BATCH_SIZE rows (keyset
+    # pagination on id), so each batch reads only its own rows and keeps the
+    # transaction small. The answer IS NULL guard makes a rerun skip rows an
+    # interrupted run already converted.
     count = 0
-    for row in result:
-        response_id = row[0]
-        answer_text = row[1]
-
-        # Convert to new JSON format
-        answer_json = json.dumps({
-            "type": "text",
-            "text": answer_text if answer_text else "",
-            "comment": None
-        })
-
-        # Update the answer column
-        session.exec(text("""
+    last_id = 0
+    while True:
+        # Upper id of the next batch; read from the primary key alone
+        upper_id = session.exec(text("""
+            SELECT MAX(id) FROM (
+                SELECT id FROM responseentry
+                WHERE id > :last_id
+                ORDER BY id
+                LIMIT :batch_size
+            ) batch
+        """), params={"last_id": last_id, "batch_size": ANSWER_BATCH_SIZE}).scalar()
+
+        if upper_id is None:
+            break
+
+        result = session.exec(text("""
             UPDATE responseentry
-            SET answer = :answer_json
-            WHERE id = :response_id
-        """), {"answer_json": answer_json, "response_id": response_id})
-
-        count += 1
+            SET answer = CAST(JSON_OBJECT(
+                'type', 'text',
+                'text', COALESCE(answer_text, ''),
+                'comment', NULL
+            ) AS CHAR)
+            WHERE id > :last_id AND id <= :upper_id
+              AND answer IS NULL
+        """), params={"last_id": last_id, "upper_id": upper_id})
+        session.commit()
+
+        last_id = upper_id
+        count += result.rowcount
+        print(f"  Migrated {count} answers...")
 
-    session.commit()
     print(f"✓ Migrated {count} answers to new JSON format")
 
 
@@ -214,22 +235,22 @@ def drop_old_columns(session: Session):
     """Drop old vendor_id columns."""
 
     # Drop vendor_id from responseentry
-    session.exec(text("""
+    alter_table(session, """
         ALTER TABLE responseentry
         DROP COLUMN vendor_id
-    """))
+    """, "ALGORITHM=INSTANT")
 
     # Drop vendor_id from questionlink
-    session.exec(text("""
+    alter_table(session, """
         ALTER TABLE questionlink
         DROP COLUMN vendor_id
-    """))
+    """, "ALGORITHM=INSTANT")
 
     # Drop vendor_id from matchlog
-    session.exec(text("""
+    alter_table(session, """
         ALTER TABLE matchlog
         DROP COLUMN vendor_id
-    """))
+    """, "ALGORITHM=INSTANT")
 
     session.commit()
     print("✓ Old vendor_id columns dropped successfully")
@@ -238,10 +259,10 @@ def drop_old_columns(session: Session):
 def drop_answer_text_column(session: Session):
     """Drop old answer_text column."""
 
-    session.exec(text("""
+    alter_table(session, """
         ALTER TABLE responseentry
         DROP COLUMN answer_text
-    """))
+    """, "ALGORITHM=INSTANT")
 
     session.commit()
     print("✓ Old answer_text column dropped successfully")
@@ -317,39 +338,33 @@ def update_indexes(session: Session):
     except Exception:
         pass
 
-    # Create new indexes
-    session.exec(text("""
-        CREATE INDEX idx_client_vendor_id ON responseentry(client_vendor_id)
-    """))
-
-    session.exec(text("""
-        CREATE INDEX idx_qlink_client_vendor ON questionlink(client_vendor_id)
-    """))
-
-    session.exec(text("""
-        CREATE INDEX idx_matchlog_client_vendor ON matchlog(client_vendor_id)
-    """))
-
-    # Update unique constraints
     try:
         session.exec(text("DROP INDEX uix_vendor_question ON responseentry"))
     except Exception:
         pass
 
-    session.exec(text("""
-        CREATE UNIQUE INDEX uix_clientvendor_question
-        ON responseentry(client_vendor_id, question_id)
-    """))
-
     try:
         session.exec(text("DROP INDEX uix_vendor_new_question ON questionlink"))
     except Exception:
         pass
 
-    session.exec(text("""
-        CREATE UNIQUE INDEX uix_clientvendor_new_question
-        ON questionlink(client_vendor_id, new_question_id)
-    """))
+    # Create new indexes and unique constraints, one ALTER (one pass) per table
+    alter_table(session, """
+        ALTER TABLE responseentry
+        ADD INDEX idx_client_vendor_id (client_vendor_id),
+        ADD UNIQUE INDEX uix_clientvendor_question (client_vendor_id, question_id)
+    """, "ALGORITHM=INPLACE, LOCK=NONE")
+
+    alter_table(session, """
+        ALTER TABLE questionlink
+        ADD INDEX idx_qlink_client_vendor (client_vendor_id),
+        ADD UNIQUE INDEX uix_clientvendor_new_question (client_vendor_id, new_question_id)
+    """, "ALGORITHM=INPLACE, LOCK=NONE")
+
+    alter_table(session, """
+        ALTER TABLE matchlog
+        ADD INDEX idx_matchlog_client_vendor (client_vendor_id)
+    """, "ALGORITHM=INPLACE, LOCK=NONE")
 
     session.commit()
     print("✓ Indexes updated successfully")
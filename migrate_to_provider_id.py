@@ -31,7 +31,8 @@ if not DATABASE_URL:
     raise ValueError("DATABASE_URL not found in environment variables")
 
 # Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+# Statement logging is opt-in (SQL_ECHO=1), as in app/services/database.py
+engine = create_engine(DATABASE_URL, echo=os.getenv('SQL_ECHO') == '1')
 
 
 def run_migration():
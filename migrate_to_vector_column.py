@@ -0,0 +1,99 @@
+"""
+Migration script to add a native VECTOR(1024) copy of the embedding column.
+
+The embedding column stores JSON text in a LONGBLOB, so every vector query
+has to convert each row before computing VECTOR_COSINE_DISTANCE. This adds
+an embedding_vec VECTOR(1024) column that the semantic search uses directly
+when present, backfills it, and keeps it in sync with triggers.
+
+Requires a MySQL version with the VECTOR type (9.0+ / HeatWave).
+"""
+from app.services.database import engine
+from sqlalchemy import text
+
+
+def migrate_vector_column():
+    """
+    Add and populate the native embedding_vec VECTOR column.
+
+    This will:
+    1. Check if responseentry table exists
+    2. Add the embedding_vec VECTOR(1024) column
+    3. Backfill it from the JSON embedding column
+    4. Create insert/update triggers that keep it in sync
+    """
+    print("Starting migration: native VECTOR column for embeddings...")
+
+    with engine.connect() as connection:
+        # Start transaction
+        trans = connection.begin()
+
+        try:
+            # Check if table exists
+            result = connection.execute(text("""
+                SELECT COUNT(*)
+                FROM information_schema.tables
+                WHERE table_schema = DATABASE()
+                AND table_name = 'responseentry'
+            """))
+
+            if result.scalar() == 0:
+                print("Table 'responseentry' does not exist. No migration needed.")
+                print("Run init_db() to create tables, then run this migration.")
+                trans.commit()
+                return
+
+            # Check if column exists
+            result = connection.execute(text("""
+                SELECT COUNT(*)
+                FROM information_schema.columns
+                WHERE table_schema = DATABASE()
+                AND table_name = 'responseentry'
+                AND column_name = 'embedding_vec'
+            """))
+
+            if result.scalar() == 0:
+                print("Adding embedding_vec VECTOR(1024) column...")
+                connection.execute(text("""
+                    ALTER TABLE responseentry
+                    ADD COLUMN embedding_vec VECTOR(1024) NULL
+                """))
+                print("✓ Added embedding_vec column")
+            else:
+                print("Column 'embedding_vec' already exists")
+
+            # Backfill rows written before the column existed
+            result = connection.execute(text("""
+                UPDATE responseentry
+                SET embedding_vec = STRING_TO_VECTOR(CONVERT(embedding USING utf8mb4))
+                WHERE embedding_vec IS NULL
+                AND embedding IS NOT NULL
+            """))
+            print(f"✓ Backfilled {result.rowcount} rows")
+
+            # Keep embedding_vec in sync on every write
+            for event in ("INSERT", "UPDATE"):
+                trigger_name = f"responseentry_embedding_vec_{event.lower()}"
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger_name}"))
+                connection.execute(text(f"""
+                    CREATE TRIGGER {trigger_name}
+                    BEFORE {event} ON responseentry
+                    FOR EACH ROW
+                    SET NEW.embedding_vec = STRING_TO_VECTOR(CONVERT(NEW.embedding USING utf8mb4))
+                """))
+                print(f"✓ Created trigger {trigger_name}")
+
+            # Commit transaction
+            trans.commit()
+            print("Migration completed successfully!")
+            print("Restart the API server so semantic search picks up embedding_vec.")
+
+        except Exception as e:
+            # Rollback on error
+            trans.rollback()
+            print(f"✗ Migration failed: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    migrate_vector_column()
@@ -2,7 +2,7 @@
 Test script for /batch-process-questionnaire endpoint
 Generates 1000 realistic vendor risk management questions to test:
 - Batch processing performance
-- Automatic chunking (>2048 questions)
+- Automatic chunking (>1024 questions)
 - Retry logic with exponential backoff
 - 4-step processing logic
 """
@@ -18,7 +18,8 @@ BATCH_ENDPOINT = f"{BASE_URL}/batch-process-questionnaire"
 CREATE_RESPONSE_ENDPOINT = f"{BASE_URL}/create-response"
 
 # Test configuration
-NUM_QUESTIONS = 1000  # Adjust to test chunking (try 3000+ for multiple chunks)
+NUM_QUESTIONS = 1000  # Adjust to test chunking (try 2000+ for multiple chunks)
+EMBEDDING_CHUNK_SIZE = 1024  # Texts per embeddings API call (app/services/embedding.py)
 
 
 def generate_realistic_questions(count: int) -> list[dict]:
@@ -271,10 +272,10 @@ def test_batch_endpoint(num_questions: int = 1000):
         print(f"  {questions[i]['id']}: {questions[i]['text'][:80]}...")
 
     # Calculate expected chunks
-    expected_chunks = (len(questions) + 2047) // 2048
+    expected_chunks = (len(questions) + EMBEDDING_CHUNK_SIZE - 1) // EMBEDDING_CHUNK_SIZE
     print(f"\nExpected API chunking:")
     print(f"  - Total questions: {len(questions)}")
-    print(f"  - Chunk size limit: 2048")
+    print(f"  - Chunk size limit: {EMBEDDING_CHUNK_SIZE}")
     print(f"  - Expected chunks: {expected_chunks}")
 
     # Make API request
@@ -0,0 +1,280 @@
+"""
+Test script for the embedding and batching logic that needs no database
+and no OpenAI account.
+
+Covers:
+- Deduplication of repeated texts within a get_batch_embeddings call
+- Normalized embedding cache keys
+- Retry-After parsing, backoff and fail-fast on client errors
+- Deduplication of repeated questions before the Step 3 search
+
+The OpenAI client is replaced by an in-process fake, so no request leaves
+the machine.
+
+Usage:
+    python test_embedding_logic.py
+"""
+
+import asyncio
+import base64
+import os
+import sys
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+from openai import RateLimitError, BadRequestError
+
+# The embedding module requires a key at import; the fake client never uses it
+os.environ.setdefault("OPENAI_API_KEY", "test-key-not-used")
+
+from app.schemas import Question
+from app.services import embedding
+from app.services import question_processor
+from app.services.embedding import (
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_RETRY_MAX_WAIT,
+    embedding_cache_key_text,
+    get_batch_embeddings,
+)
+from app.services.question_processor import QuestionProcessor
+
+
+class FakeEmbeddings:
+    """Stand-in for AsyncOpenAI.embeddings that records every request."""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        # Exceptions raised by the first calls, in order
+        self.failures = list(failures or [])
+
+    async def create(self, input, model, dimensions, encoding_format):
+        self.calls.append(list(input) if isinstance(input, list) else [input])
+        if self.failures:
+            raise self.failures.pop(0)
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[
+            SimpleNamespace(embedding=fake_vector(text)) for text in texts
+        ])
+
+
+def fake_vector(text):
+    """Deterministic base64 float32 vector for a text, like encoding_format="base64"."""
+    seed = sum(ord(c) for c in embedding_cache_key_text(text))
+    vector = np.random.default_rng(seed).normal(size=EMBEDDING_DIMENSIONS).astype("<f4")
+    return base64.b64encode(vector.tobytes()).decode()
+
+
+def use_fake_client(failures=None):
+    """Install a fresh fake client and empty the embedding cache."""
+    fake = FakeEmbeddings(failures)
+    embedding.openai_client = SimpleNamespace(embeddings=fake)
+    embedding._embedding_cache.clear()
+    return fake
+
+
+def api_error(error_class, status_code, headers=None):
+    """Build an OpenAI SDK error as raised for an HTTP error response."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class("test error", response=response, body=None)
+
+
+def test_batch_deduplication():
+    """Test: repeated texts within one batch are sent to the API once"""
+    print("\n" + "=" * 60)
+    print("TEST 1: Batch Deduplication (get_batch_embeddings)")
+    print("=" * 60)
+
+    fake = use_fake_client()
+    texts = ["Do you encrypt data?", "do you   ENCRYPT data?", "Password policy?", "Do you encrypt data?"]
+    embeddings = asyncio.run(get_batch_embeddings(texts))
+
+    sent = [text for call in fake.calls for text in call]
+    if len(sent) != 2:
+        print(f"✗ Expected 2 distinct texts sent, got {len(sent)}: {sent}")
+        return False
+    if not (embeddings[0] == embeddings[1] == embeddings[3]) or embeddings[0] == embeddings[2]:
+        print("✗ Repeated texts did not share their first occurrence's embedding")
+        return False
+    if len(embeddings) != len(texts):
+        print(f"✗ Expected {len(texts)} embeddings in input order, got {len(embeddings)}")
+        return False
+
+    print(f"✓ {len(texts)} texts, {len(sent)} sent to the API, order preserved")
+    return True
+
+
+def test_cache_keys():
+    """Test: cache keys ignore case and whitespace but not wording or punctuation"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Normalized Embedding Cache Keys")
+    print("=" * 60)
+
+    same = [("Hello   World", " hello world "), ("A\tB\nC", "a b c")]
+    different = [("hello world", "hello, world"), ("hello world", "hello worlds")]
+
+    for a, b in same:
+        if embedding._cache_key(a) != embedding._cache_key(b):
+            print(f"✗ {a!r} and {b!r} should share a cache key")
+            return False
+    for a, b in different:
+        if embedding._cache_key(a) == embedding._cache_key(b):
+            print(f"✗ {a!r} and {b!r} should not share a cache key")
+            return False
+    print("✓ Case and whitespace variants share a key; other edits don't")
+
+    fake = use_fake_client()
+    first = asyncio.run(get_batch_embeddings(["What is your SLA?"]))
+    second = asyncio.run(get_batch_embeddings(["  what is your   sla? "]))
+    if len(fake.calls) != 1 or first != second:
+        print(f"✗ Normalized repeat not served from cache ({len(fake.calls)} API calls)")
+        return False
+
+    print("✓ Normalized repeat served from the cache without an API call")
+    return True
+
+
+def test_retry_after_parsing():
+    """Test: Retry-After headers are honored, otherwise capped exponential backoff"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Retry-After Parsing and Backoff")
+    print("=" * 60)
+
+    cases = [
+        # (headers, retry_count, lowest, highest)
+        ({"retry-after": "2"}, 1, 2.0, 2.6),
+        ({"retry-after-ms": "500"}, 1, 0.5, 0.65),
+        ({"retry-after-ms": "500", "retry-after": "9"}, 1, 0.5, 0.65),
+        ({"retry-after": "120"}, 1, EMBEDDING_RETRY_MAX_WAIT, EMBEDDING_RETRY_MAX_WAIT * 1.3),
+        ({"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"}, 2, 2.0, 6.0),
+        ({}, 3, 4.0, 12.0),
+        ({}, 10, EMBEDDING_RETRY_MAX_WAIT * 0.5, EMBEDDING_RETRY_MAX_WAIT * 1.5),
+    ]
+
+    for headers, retry_count, lowest, highest in cases:
+        error = api_error(RateLimitError, 429, headers)
+        for _ in range(20):
+            wait = embedding._retry_wait_time(error, retry_count)
+            if not lowest <= wait <= highest:
+                print(f"✗ headers={headers} retry={retry_count}: waited {wait:.2f}s, expected {lowest}-{highest}s")
+                return False
+    print(f"✓ {len(cases)} header/backoff cases within their bounds")
+
+    # Retries run through get_batch_embeddings without real sleeps
+    retry_wait_time = embedding._retry_wait_time
+    embedding._retry_wait_time = lambda error, retry_count: 0
+    try:
+        fake = use_fake_client([api_error(RateLimitError, 429), api_error(RateLimitError, 429)])
+        asyncio.run(get_batch_embeddings(["rate limited twice"]))
+        if len(fake.calls) != 3:
+            print(f"✗ Expected 2 retries then success (3 calls), got {len(fake.calls)}")
+            return False
+        print("✓ Rate limited request retried until it succeeded")
+
+        fake = use_fake_client([api_error(BadRequestError, 400)])
+        try:
+            asyncio.run(get_batch_embeddings(["bad request"]))
+            print("✗ 400 error was swallowed")
+            return False
+        except BadRequestError:
+            pass
+        if len(fake.calls) != 1:
+            print(f"✗ 400 error retried ({len(fake.calls)} calls)")
+            return False
+        print("✓ 400 error fails fast without retrying")
+    finally:
+        embedding._retry_wait_time = retry_wait_time
+
+    return True
+
+
+def test_search_deduplication():
+    """Test: repeated questions in a batch are embedded and searched once"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Question Deduplication Before Step 3")
+    print("=" * 60)
+
+    embedded = []
+    searched = []
+
+    async def fake_batch_embeddings(texts):
+        embedded.append(list(texts))
+        return [[float(i)] for i in range(len(texts))]
+
+    async def no_match(question):
+        return None
+
+    async def record_search(embeddings):
+        searched.append(len(embeddings))
+        return [[] for _ in embeddings]
+
+    async def echo_result(question, search_results):
+        return question.id
+
+    # Steps 1, 2 and 4 and the database checks are replaced, leaving only
+    # the batching logic of process_batch_questions under test
+    processor = QuestionProcessor(None, "test-client", "test-provider")
+    processor._prefetch_id_matches = lambda questions: None
+    processor._step1_id_match = no_match
+    processor._step2_fuzzy_match = no_match
+    processor._has_no_responses = lambda: False
+    processor._step3_semantic_search = record_search
+    processor._step4_confidence_engine = echo_result
+
+    get_batch_embeddings_original = question_processor.get_batch_embeddings
+    question_processor.get_batch_embeddings = fake_batch_embeddings
+    try:
+        questions = [
+            Question(id="Q1", text="Do you have an incident response plan?"),
+            Question(id="Q2", text="  do you have an   incident response plan? "),
+            Question(id="Q3", text="Do you have a BCP?"),
+            Question(id="Q4", text="DO YOU HAVE AN INCIDENT RESPONSE PLAN?"),
+        ]
+        results = asyncio.run(processor.process_batch_questions(questions))
+    finally:
+        question_processor.get_batch_embeddings = get_batch_embeddings_original
+
+    if embedded != [["Do you have an incident response plan?", "Do you have a BCP?"]]:
+        print(f"✗ Expected 2 distinct texts embedded, got {embedded}")
+        return False
+    if searched != [2]:
+        print(f"✗ Expected one search for 2 texts, got {searched}")
+        return False
+    if results != ["Q1", "Q2", "Q3", "Q4"]:
+        print(f"✗ Results not returned in question order: {results}")
+        return False
+
+    print(f"✓ {len(questions)} questions, 2 texts embedded and searched, results in order")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("EMBEDDING LOGIC TEST SUITE")
+    print("=" * 60)
+
+    tests = [
+        test_batch_deduplication,
+        test_cache_keys,
+        test_retry_after_parsing,
+        test_search_deduplication,
+    ]
+    tests_passed = 0
+    for test in tests:
+        try:
+            if test():
+                tests_passed += 1
+        except Exception as e:
+            print(f"✗ Unexpected error in {test.__name__}: {str(e)}")
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {tests_passed}/{len(tests)} passed")
+    print("=" * 60)
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
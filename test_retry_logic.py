@@ -73,7 +73,7 @@ def test_large_batch_chunking():
     print("\n" + "="*80)
     print("TEST 3: Large Batch (3000 questions) - Chunking Test")
     print("="*80)
-    print("Expected: 2 chunks (2048 + 952), 2 API calls")
+    print("Expected: 3 chunks (1024 + 1024 + 952), 3 API calls")
 
     questions = [
         {"id": f"LARGE-{i:05d}", "text": f"Security question {i} about vendor compliance"}
@@ -93,7 +93,7 @@ def test_large_batch_chunking():
         if response.status_code == 200:
             result = response.json()
             print(f"✓ Success: {len(result['results'])} results returned")
-            print(f"  Expected 2 chunks of 2048 + 952")
+            print(f"  Expected 3 chunks of 1024 + 1024 + 952")
             return True
         else:
             print(f"✗ Failed: Status {response.status_code}")
@@ -104,22 +104,22 @@ def test_large_batch_chunking():
         return False
 
 
-def test_edge_case_2048():
-    """Test: Exactly 2048 questions - Boundary test"""
+def test_edge_case_1024():
+    """Test: Exactly 1024 questions - Boundary test"""
     print("\n" + "="*80)
-    print("TEST 4: Edge Case (Exactly 2048 questions)")
+    print("TEST 4: Edge Case (Exactly 1024 questions)")
     print("="*80)
     print("Expected: 1 chunk, 1 API call (no splitting)")
 
     questions = [
         {"id": f"EDGE-{i:05d}", "text": f"Question {i}"}
-        for i in range(1, 2049)
+        for i in range(1, 1025)
     ]
 
     payload = {"questions": questions}
 
     try:
-        print(f"Sending exactly 2048 questions...")
+        print(f"Sending exactly 1024 questions...")
         response = requests.post(BATCH_ENDPOINT, json=payload, timeout=600)
 
         if response.status_code == 200:
@@ -135,28 +135,28 @@ def test_edge_case_2048():
         return False
 
 
-def test_edge_case_2049():
-    """Test: 2049 questions - Just over boundary"""
+def test_edge_case_1025():
+    """Test: 1025 questions - Just over boundary"""
     print("\n" + "="*80)
-    print("TEST 5: Edge Case (2049 questions - Over Boundary)")
+    print("TEST 5: Edge Case (1025 questions - Over Boundary)")
     print("="*80)
-    print("Expected: 2 chunks (2048 + 1), 2 API calls")
+    print("Expected: 2 chunks (1024 + 1), 2 API calls")
 
     questions = [
         {"id": f"OVER-{i:05d}", "text": f"Question {i}"}
-        for i in range(1, 2050)
+        for i in range(1, 1026)
     ]
 
     payload = {"questions": questions}
 
     try:
-        print(f"Sending 2049 questions (1 over limit)...")
+        print(f"Sending 1025 questions (1 over limit)...")
         response = requests.post(BATCH_ENDPOINT, json=payload, timeout=600)
 
         if response.status_code == 200:
             result = response.json()
             print(f"✓ Success: {len(result['results'])} results returned")
-            print(f"  Should be split into 2 chunks (2048 + 1)")
+            print(f"  Should be split into 2 chunks (1024 + 1)")
             return True
         else:
             print(f"✗ Failed: Status {response.status_code}")
@@ -171,7 +171,7 @@ def test_massive_batch():
     print("\n" + "="*80)
     print("TEST 6: Massive Batch (10000 questions)")
     print("="*80)
-    print("Expected: 5 chunks, 5 API calls")
+    print("Expected: 10 chunks, 10 API calls")
     print("⚠ This test takes longer and may hit rate limits (tests retry logic)")
 
     questions = [
@@ -193,7 +193,7 @@ def test_massive_batch():
         if response.status_code == 200:
             result = response.json()
             print(f"✓ Success: {len(result['results'])} results returned")
-            print(f"  Processed in 5 chunks of ~2000 each")
+            print(f"  Processed in 10 chunks of up to 1024 each")
 
             # Analyze results
             status_counts = {}
@@ -234,8 +234,8 @@ def main():
         ("Small Batch (10)", test_small_batch),
         ("Medium Batch (500)", test_medium_batch),
         ("Large Batch (3000)", test_large_batch_chunking),
-        ("Edge Case (2048)", test_edge_case_2048),
-        ("Edge Case (2049)", test_edge_case_2049),
+        ("Edge Case (1024)", test_edge_case_1024),
+        ("Edge Case (1025)", test_edge_case_1025),
         ("Massive Batch (10000)", test_massive_batch),
     ]
 
@@ -271,8 +271,8 @@ def main():
     if passed == total:
         print("\n🎉 All tests passed!")
         print("\nFeatures verified:")
-        print("  ✓ Automatic chunking (2048 question limit)")
-        print("  ✓ Boundary conditions (2048, 2049)")
+        print("  ✓ Automatic chunking (1024 question limit)")
+        print("  ✓ Boundary conditions (1024, 1025)")
         print("  ✓ Large batch processing (3000+ questions)")
         print("  ✓ Massive batch processing (10000 questions)")
     else:
@@ -0,0 +1,313 @@
+"""
+Test script for semantic search scoring, Step 1 prefetch and the
+in-memory embedding index.
+
+The database tests run against the MySQL database in DATABASE_URL (no API
+server needed); all rows are written under a scratch provider and removed at
+the end. They are skipped when DATABASE_URL is not a reachable MySQL server.
+The embedding and batching logic is covered without a database by
+test_embedding_logic.py.
+"""
+
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlmodel import Session, delete
+
+# Load environment variables before the app reads DATABASE_URL
+load_dotenv()
+
+from app.models import ResponseEntry, QuestionLink, MatchLog
+from app.schemas import Question
+from app.services.database import engine, init_db
+from app.services.embedding_index import (
+    EmbeddingIndex,
+    get_embedding_index,
+    add_to_embedding_index,
+    invalidate_embedding_index,
+)
+from app.services.semantic_search import _row_to_result, search_similar_questions_batch
+from app.services.question_processor import QuestionProcessor
+from app.api.responses import delete_response
+
+
+PROVIDER_ID = "test-search-consistency"
+EMBEDDING_DIM = 1024
+
+
+def random_embeddings(count, seed):
+    """Reproducible random embedding vectors."""
+    return np.random.default_rng(seed).normal(size=(count, EMBEDDING_DIM)).tolist()
+
+
+def make_response(question_id, embedding):
+    """Scratch ResponseEntry for the test provider."""
+    return ResponseEntry(
+        provider_id=PROVIDER_ID,
+        question_id=question_id,
+        question_text=f"Test question {question_id}",
+        answer={"type": "text", "text": f"Answer {question_id}"},
+        evidence=None,
+        embedding=embedding
+    )
+
+
+def cleanup():
+    """Remove every row written under the test provider."""
+    with Session(engine) as session:
+        session.exec(delete(QuestionLink).where(QuestionLink.provider_id == PROVIDER_ID))
+        session.exec(delete(MatchLog).where(MatchLog.provider_id == PROVIDER_ID))
+        session.exec(delete(ResponseEntry).where(ResponseEntry.provider_id == PROVIDER_ID))
+        session.commit()
+    invalidate_embedding_index(PROVIDER_ID)
+
+
+def test_score_scale_parity():
+    """Test: in-memory search and MySQL distance conversion agree on scores"""
+    print("\n" + "=" * 60)
+    print("TEST 1: Score Scale Parity (in-memory vs MySQL conversion)")
+    print("=" * 60)
+
+    embeddings = random_embeddings(5, seed=1)
+    query = random_embeddings(1, seed=2)[0]
+    responses = [make_response(f"P{i}", e) for i, e in enumerate(embeddings)]
+    for i, response in enumerate(responses):
+        response.id = i
+
+    index = EmbeddingIndex(responses, embeddings)
+    in_memory = index.search([query], top_k=len(responses))[0]
+
+    failures = 0
+    q = np.asarray(query)
+    for result in in_memory:
+        v = np.asarray(embeddings[result.response.id])
+        cosine = float(v @ q / (np.linalg.norm(v) * np.linalg.norm(q)))
+        # VECTOR_COSINE_DISTANCE returns 1 - cosine
+        row = SimpleNamespace(
+            id=result.response.id, provider_id=PROVIDER_ID, question_id="x", question_text="x",
+            answer={"type": "text", "text": "x"}, evidence=None, distance_score=1.0 - cosine
+        )
+        mysql_score = _row_to_result(row).similarity_score
+        if abs(mysql_score - result.similarity_score) > 1e-5:
+            print(f"✗ Row {result.response.id}: in-memory {result.similarity_score:.6f} != MySQL {mysql_score:.6f}")
+            failures += 1
+
+    if failures:
+        return False
+    print(f"✓ {len(in_memory)} scores identical on the (1 + cos) / 2 scale")
+    return True
+
+
+def test_score_parity_mysql():
+    """Test: the same vectors score the same through MySQL and the in-memory index"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Score Parity Against MySQL VECTOR_COSINE_DISTANCE")
+    print("=" * 60)
+
+    embeddings = random_embeddings(5, seed=3)
+    queries = random_embeddings(2, seed=4)
+
+    try:
+        with Session(engine) as session:
+            session.add_all([make_response(f"M{i}", e) for i, e in enumerate(embeddings)])
+            session.commit()
+
+            invalidate_embedding_index(PROVIDER_ID)
+            index = get_embedding_index(session, PROVIDER_ID)
+            in_memory = index.search(queries, top_k=5)
+            mysql = asyncio.run(search_similar_questions_batch(session, PROVIDER_ID, queries, top_k=5))
+
+        for memory_results, mysql_results in zip(in_memory, mysql):
+            memory_scores = {r.response.id: r.similarity_score for r in memory_results}
+            mysql_scores = {r.response.id: r.similarity_score for r in mysql_results}
+            if memory_scores.keys() != mysql_scores.keys():
+                print(f"✗ Different matches: {sorted(memory_scores)} vs {sorted(mysql_scores)}")
+                return False
+            for response_id, score in mysql_scores.items():
+                if abs(memory_scores[response_id] - score) > 1e-4:
+                    print(f"✗ Response {response_id}: in-memory {memory_scores[response_id]:.6f} != MySQL {score:.6f}")
+                    return False
+
+        print("✓ In-memory and MySQL scores match for every query")
+        return True
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        return False
+    finally:
+        cleanup()
+
+
+def test_step1_prefetch():
+    """Test: Step 1 lookups are loaded in two queries and answer saved links and exact IDs"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Step 1 Prefetch (saved links + exact ID)")
+    print("=" * 60)
+
+    embeddings = random_embeddings(2, seed=5)
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        with Session(engine) as session:
+            exact = make_response("EXACT-1", embeddings[0])
+            linked = make_response("CANONICAL-1", embeddings[1])
+            session.add_all([exact, linked])
+            session.flush()
+            session.add(QuestionLink(provider_id=PROVIDER_ID, new_question_id="NEW-1", linked_response_id=linked.id))
+            session.commit()
+            exact_id, linked_id = exact.id, linked.id
+
+            questions = [
+                Question(id="EXACT-1", text="anything"),
+                Question(id="NEW-1", text="anything"),
+                Question(id="UNKNOWN-1", text="anything"),
+            ] + [Question(id=f"UNKNOWN-{i}", text="anything") for i in range(2, 50)]
+
+            processor = QuestionProcessor(session, "test-client", PROVIDER_ID)
+            event.listen(engine, "before_cursor_execute", count_statement)
+            try:
+                processor._prefetch_id_matches(questions)
+            finally:
+                event.remove(engine, "before_cursor_execute", count_statement)
+
+            if len(statements) != 2:
+                print(f"✗ Expected 2 queries for {len(questions)} questions, got {len(statements)}")
+                return False
+            print(f"✓ {len(questions)} questions prefetched in 2 queries")
+
+            exact_result = asyncio.run(processor._step1_id_match(questions[0]))
+            linked_result = asyncio.run(processor._step1_id_match(questions[1]))
+            unknown_result = asyncio.run(processor._step1_id_match(questions[2]))
+
+            if exact_result is None or exact_result.data.answer.text != "Answer EXACT-1":
+                print(f"✗ Exact ID match not found (response {exact_id})")
+                return False
+            if linked_result is None or linked_result.data.canonical_question_text != "Test question CANONICAL-1":
+                print(f"✗ Saved link not followed to response {linked_id}")
+                return False
+            if unknown_result is not None:
+                print("✗ Unknown question ID matched")
+                return False
+
+        print("✓ Exact ID and saved link answered, unknown ID falls through")
+        return True
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        return False
+    finally:
+        cleanup()
+
+
+def test_index_invalidation():
+    """Test: the cached index follows creates, deletes and outside writes"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Embedding Index Invalidation (create / delete)")
+    print("=" * 60)
+
+    embeddings = random_embeddings(4, seed=6)
+
+    try:
+        with Session(engine) as session:
+            session.add(make_response("I0", embeddings[0]))
+            session.commit()
+
+            invalidate_embedding_index(PROVIDER_ID)
+            index = get_embedding_index(session, PROVIDER_ID)
+            if len(index.responses) != 1:
+                print(f"✗ Expected 1 row after load, got {len(index.responses)}")
+                return False
+
+            # Create through the same path as POST /api/v1/responses
+            created = make_response("I1", embeddings[1])
+            session.add(created)
+            session.flush()
+            add_to_embedding_index(PROVIDER_ID, [created])
+            session.commit()
+
+            after_create = get_embedding_index(session, PROVIDER_ID)
+            top = after_create.search([embeddings[1]], top_k=1)[0][0]
+            if after_create is not index or top.response.question_id != "I1":
+                print("✗ Created response not appended to the cached index")
+                return False
+            print("✓ Create appends to the cached index without a reload")
+
+            # Delete through the API handler
+            delete_response(created.id, session)
+            after_delete = get_embedding_index(session, PROVIDER_ID)
+            if any(r.question_id == "I1" for r in after_delete.responses):
+                print("✗ Deleted response still in the index")
+                return False
+            print("✓ Delete drops the response from the index")
+
+        # A write from another session (another worker, a script, direct SQL)
+        with Session(engine) as other_session:
+            other_session.add(make_response("I2", embeddings[2]))
+            other_session.commit()
+
+        with Session(engine) as session:
+            after_outside_write = get_embedding_index(session, PROVIDER_ID)
+            if not any(r.question_id == "I2" for r in after_outside_write.responses):
+                print("✗ Row written outside this process's create path not picked up")
+                return False
+        print("✓ Outside write detected and the index reloaded")
+        return True
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        return False
+    finally:
+        cleanup()
+
+
+def mysql_unavailable_reason():
+    """Why the database tests can't run here, or None if MySQL is reachable."""
+    if engine.dialect.name != "mysql":
+        return f"DATABASE_URL is {engine.dialect.name}, not MySQL"
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        return f"cannot connect to MySQL: {e}"
+    return None
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("SEARCH CONSISTENCY TEST SUITE")
+    print("=" * 60)
+
+    tests = [test_score_scale_parity]
+    database_tests = [
+        test_score_parity_mysql,
+        test_step1_prefetch,
+        test_index_invalidation,
+    ]
+
+    skip_reason = mysql_unavailable_reason()
+    if skip_reason:
+        print(f"\n- Skipping {len(database_tests)} database tests: {skip_reason}")
+    else:
+        # init_db also creates the search indexes, which reads MySQL's information_schema
+        init_db()
+        cleanup()
+        tests += database_tests
+
+    tests_passed = sum(1 for test in tests if test())
+
+    print("\n" + "=" * 60)
+    print(f"Test Results: {tests_passed}/{len(tests)} passed")
+    if skip_reason:
+        print(f"Skipped: {len(database_tests)} (needs MySQL)")
+    print("=" * 60)
+
+    return 0 if tests_passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())